@@ -1,12 +1,29 @@
+import asyncio
 import json
 import logging
-from typing import Dict, List, Any
-from langchain_openai import AzureChatOpenAI
+from functools import cached_property
+from typing import Dict, List, Any, Tuple
 from langchain.prompts import PromptTemplate
-from config.azure_config import AZURE_OPENAI_CONFIG
+from utils.azure_clients import AZURE_SEM, get_chat_llm
+from utils.json_utils import parse_llm_json
 
 logger = logging.getLogger(__name__)
 
+# Default values for optional FAQ fields the model may omit
+_FAQ_DEFAULTS = {
+    "category": "regulatory",
+    "priority": "medium",
+    "regulatory_reference": "Regulatory Update"
+}
+
+def _is_valid_faq(faq: Any) -> bool:
+    """Check that a generated FAQ is an object with a string question and answer"""
+    return (
+        isinstance(faq, dict)
+        and isinstance(faq.get("question"), str)
+        and isinstance(faq.get("answer"), str)
+    )
+
 class FAQAgent:
     """
     Agent responsible for generating FAQs from regulatory text and context.
@@ -14,15 +31,6 @@ class FAQAgent:
     """
 
     def __init__(self):
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
-            azure_deployment=AZURE_OPENAI_CONFIG["gpt_deployment"],
-            api_version=AZURE_OPENAI_CONFIG["api_version"],
-            api_key=AZURE_OPENAI_CONFIG["api_key"],
-            temperature=0.3,  # Lower temperature for more consistent output
-            max_tokens=2000
-        )
-
         # Define the FAQ generation prompt
         self.faq_prompt = PromptTemplate(
             input_variables=["regulatory_text", "context"],
@@ -64,6 +72,17 @@ Generate exactly 3-5 FAQs and return only the JSON array, no additional text.
 """
         )
 
+        # Plain template string: str.format skips PromptTemplate's per-call validation
+        self._faq_template = self.faq_prompt.template
+
+    @cached_property
+    def llm(self):
+        """Azure OpenAI chat model, created on first use"""
+        return get_chat_llm(
+            temperature=0.3,  # Lower temperature for more consistent output
+            max_tokens=2000
+        )
+
     def generate_faqs(self, regulatory_text: str, context: str = "") -> List[Dict[str, Any]]:
         """
         Generate FAQs from regulatory text.
@@ -77,7 +96,7 @@ Generate exactly 3-5 FAQs and return only the JSON array, no additional text.
         """
         try:
             # Format the prompt
-            prompt_text = self.faq_prompt.format(
+            prompt_text = self._faq_template.format(
                 regulatory_text=regulatory_text,
                 context=context
             )
@@ -85,19 +104,70 @@ Generate exactly 3-5 FAQs and return only the JSON array, no additional text.
             # Generate FAQs using the LLM
             response = self.llm.invoke(prompt_text)
 
-            # Parse the JSON response
-            faq_json = response.content.strip()
+        except Exception as e:
+            logger.error(f"Error generating FAQs: {e}")
+            return self._generate_fallback_faqs(regulatory_text)
+
+        return self._parse_faq_response(response.content, regulatory_text)
 
-            # Clean up the response if it has markdown formatting
-            if faq_json.startswith("```json"):
-                faq_json = faq_json[7:]
-            if faq_json.endswith("```"):
-                faq_json = faq_json[:-3]
+    async def agenerate_faqs(self, regulatory_text: str, context: str = "") -> List[Dict[str, Any]]:
+        """
+        Async variant of generate_faqs that does not block the event loop
+        while waiting on Azure OpenAI.
 
-            faq_json = faq_json.strip()
+        Args:
+            regulatory_text: The regulatory text to analyze
+            context: Additional context about customer queries or patterns
 
-            # Parse JSON
-            faqs = json.loads(faq_json)
+        Returns:
+            List of FAQ dictionaries
+        """
+        try:
+            prompt_text = self._faq_template.format(
+                regulatory_text=regulatory_text,
+                context=context
+            )
+
+            async with AZURE_SEM.slot(background=True):
+                response = await self.llm.ainvoke(prompt_text)
+
+        except Exception as e:
+            logger.error(f"Error generating FAQs: {e}")
+            return self._generate_fallback_faqs(regulatory_text)
+
+        return self._parse_faq_response(response.content, regulatory_text)
+
+    async def agenerate_faqs_batch(self, items: List[Tuple[str, str]]) -> List[List[Dict[str, Any]]]:
+        """
+        Generate FAQs for several regulatory texts concurrently. Each request
+        takes a background slot of the shared Azure limit, so the batch yields
+        to interactive queries.
+
+        Args:
+            items: (regulatory_text, context) pairs to analyze
+
+        Returns:
+            One list of FAQ dictionaries per item, in input order
+        """
+        return list(await asyncio.gather(*(
+            self.agenerate_faqs(regulatory_text, context)
+            for regulatory_text, context in items
+        )))
+
+    def _parse_faq_response(self, content: str, regulatory_text: str) -> List[Dict[str, Any]]:
+        """
+        Parse and validate the raw LLM output into FAQ dictionaries.
+
+        Args:
+            content: Raw response content from the LLM
+            regulatory_text: The regulatory text (used for fallback FAQs)
+
+        Returns:
+            List of FAQ dictionaries
+        """
+        try:
+            # Parse JSON, stripping any markdown code fence
+            faqs = parse_llm_json(content)
 
             # Validate the structure
             if not isinstance(faqs, list):
@@ -106,22 +176,15 @@ Generate exactly 3-5 FAQs and return only the JSON array, no additional text.
             if not 3 <= len(faqs) <= 5:
                 logger.warning(f"Generated {len(faqs)} FAQs, expected 3-5. Adjusting...")
 
-            # Ensure each FAQ has required fields
-            validated_faqs = []
-            for faq in faqs:
-                if isinstance(faq, dict) and "question" in faq and "answer" in faq:
-                    # Add default values for missing fields
-                    faq.setdefault("category", "regulatory")
-                    faq.setdefault("priority", "medium")
-                    faq.setdefault("regulatory_reference", "Regulatory Update")
-                    validated_faqs.append(faq)
+            # Keep FAQs with the required fields, adding default values for missing ones
+            validated_faqs = [{**_FAQ_DEFAULTS, **faq} for faq in faqs if _is_valid_faq(faq)]
 
             logger.info(f"Successfully generated {len(validated_faqs)} FAQs")
             return validated_faqs[:5]  # Limit to 5 max
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse FAQ JSON: {e}")
-            logger.error(f"Raw response: {response.content}")
+            logger.error(f"Raw response: {content}")
             return self._generate_fallback_faqs(regulatory_text)
 
         except Exception as e:
@@ -1,18 +1,108 @@
-import json
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
-from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
-from langchain.memory import ConversationBufferMemory
+import os
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from langchain.memory import ConversationBufferWindowMemory
 from langchain.prompts import PromptTemplate
-from langchain.schema import BaseMessage, HumanMessage, AIMessage
-from duckduckgo_search import DDGS
 import re
-from datetime import datetime, timedelta
-from config.azure_config import AZURE_OPENAI_CONFIG
+import threading
+import time
+from cachetools import TTLCache
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from datetime import datetime
+try:
+    from ddgs import DDGS
+except ImportError:
+    from duckduckgo_search import DDGS
+from utils.azure_clients import AZURE_SEM, get_chat_llm, get_embeddings
+from utils.json_utils import parse_llm_json
 from utils.memory_storage import RegulatoryKnowledgeBase
+from utils.semantic_cache import SemanticCache
+from utils.embedding_batcher import EmbeddingBatcher
 
 logger = logging.getLogger(__name__)
 
+# Markdown cleanup patterns, compiled once at import
+_MD_HEADER = re.compile(r'^#+\s+', re.MULTILINE)
+_MD_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC = re.compile(r'\*(.*?)\*')
+_MD_LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+_MD_CODE_BLOCK = re.compile(r'```[^\n]*\n(.*?)\n```', re.DOTALL)
+_MD_INLINE_CODE = re.compile(r'`([^`]+)`')
+_MD_EXCESS_NEWLINES = re.compile(r'\n{3,}')
+_MD_HORIZONTAL_RULE = re.compile(r'^[-*_]{3,}$', re.MULTILINE)
+
+# Seconds to wait for real-time search before answering without it
+_REALTIME_SEARCH_TIMEOUT = 3.0
+
+# Outbound DuckDuckGo searches share a small pool so bursts can't flood it
+_DDGS_MAX_CONCURRENCY = 4
+_DDGS_POOL = ThreadPoolExecutor(max_workers=_DDGS_MAX_CONCURRENCY, thread_name_prefix="ddgs")
+_DDGS_SEMAPHORE = asyncio.Semaphore(_DDGS_MAX_CONCURRENCY)
+
+
+def _release_ddgs_slot(loop: asyncio.AbstractEventLoop):
+    """Release a DDGS slot from the search thread once its search is done"""
+    try:
+        loop.call_soon_threadsafe(_DDGS_SEMAPHORE.release)
+    except RuntimeError:
+        pass  # Event loop already closed
+
+
+# Common banking regulatory topics and their follow-up questions
+_TOPIC_SUGGESTIONS = {
+    "kyc": [
+        "What documents do I need for KYC verification?",
+        "How long does KYC verification usually take?",
+        "What happens if my KYC verification is delayed?"
+    ],
+    "compliance": [
+        "What are the main compliance requirements for my account?",
+        "How can I ensure I'm meeting all compliance standards?",
+        "Who can I contact for compliance-related questions?"
+    ],
+    "account": [
+        "What types of accounts are affected by these changes?",
+        "How do these changes affect my existing account?",
+        "Are there any fees associated with account updates?"
+    ],
+    "deadline": [
+        "What is the exact deadline for compliance?",
+        "What happens if I miss the deadline?",
+        "Are there any extensions available?"
+    ],
+    "default": [
+        "Can you explain this in simpler terms?",
+        "What should I do next?",
+        "Who can I contact for more specific guidance?"
+    ]
+}
+
+# Topic keywords, matched as substrings in one pass
+_TOPIC_PATTERN = re.compile('|'.join(topic for topic in _TOPIC_SUGGESTIONS if topic != "default"))
+
+# Seconds to skip real-time search after it fails
+_SEARCH_FAILURE_BACKOFF = 30.0
+
+_SEARCH_UNAVAILABLE = "Unable to perform real-time search at this time."
+
+# Answer characters to stream before starting suggestion generation
+_SUGGESTIONS_HEAD_START_CHARS = 200
+
+# Signals that a query needs recent information: temporal keywords (matched as
+# substrings) and date patterns, combined so a query is scanned in one pass
+_REALTIME_PATTERN = re.compile('|'.join([
+    *map(re.escape, [
+        "recent", "latest", "current", "new", "update", "change",
+        "today", "this week", "this month", "breaking", "news"
+    ]),
+    r'\d{1,2}/\d{1,2}/\d{4}',  # MM/DD/YYYY
+    r'\d{4}-\d{1,2}-\d{1,2}',  # YYYY-MM-DD
+    r'\b(?:january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}\b'
+]))
+
 class QueryAgent:
     """
     Agent responsible for answering user queries with conversational memory
@@ -22,26 +112,23 @@ class QueryAgent:
     def __init__(self, knowledge_base: RegulatoryKnowledgeBase):
         self.knowledge_base = knowledge_base
 
-        # Initialize Azure OpenAI LLM
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
-            azure_deployment=AZURE_OPENAI_CONFIG["gpt_deployment"],
-            api_version=AZURE_OPENAI_CONFIG["api_version"],
-            api_key=AZURE_OPENAI_CONFIG["api_key"],
-            temperature=0.2,  # Slightly creative for conversational responses
-            max_tokens=1500
+        # Cache of previous answers, keyed by query text and query embedding;
+        # raise the threshold to only reuse answers for closer paraphrases
+        self.response_cache = SemanticCache(
+            threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92")),
+            max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+            ttl=float(os.environ["RESPONSE_CACHE_TTL"]) if os.getenv("RESPONSE_CACHE_TTL") else None
         )
 
-        # Initialize embeddings for semantic search
-        self.embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
-            azure_deployment=AZURE_OPENAI_CONFIG["embedding_deployment"],
-            api_version=AZURE_OPENAI_CONFIG["api_version"],
-            api_key=AZURE_OPENAI_CONFIG["api_key"]
-        )
+        # LRU of query text -> embedding, shared by the response cache and FAQ search
+        self._query_embeddings = OrderedDict()
+        self._query_embeddings_max_size = 4096
+        self._query_embeddings_lock = threading.Lock()  # also used from worker threads
+
+        # Coalesces concurrent query embeddings into shared API calls once started
+        self.embedding_batcher = EmbeddingBatcher(self._aembed_documents)
 
         # Initialize conversation memory
-        from langchain.memory import ConversationBufferWindowMemory
         self.memory = ConversationBufferWindowMemory(
             return_messages=True,
             memory_key="chat_history",
@@ -49,12 +136,14 @@ class QueryAgent:
             k=10  # Keep last 10 interactions
         )
 
-        # Initialize DuckDuckGo search
-        try:
-            from ddgs import DDGS
-        except ImportError:
-            from duckduckgo_search import DDGS
-        self.ddgs = DDGS()
+        # Pre-formatted lines for the last 6 messages, used as prompt history
+        self._history_lines = deque(maxlen=6)
+        self._history_chars = 0
+
+        # Recent search results, and a cool-down after search failures
+        self._search_cache = TTLCache(maxsize=512, ttl=300)
+        self._search_cache_lock = threading.Lock()  # searches run on worker threads
+        self._search_unavailable_until = 0.0
 
         # Define the query response prompt
         self.query_prompt = PromptTemplate(
@@ -124,6 +213,28 @@ Suggestions:
 """
         )
 
+        # Plain template strings: str.format skips PromptTemplate's per-call validation
+        self._query_template = self.query_prompt.template
+        self._suggestions_template = self.suggestions_prompt.template
+
+    @cached_property
+    def llm(self):
+        """Azure OpenAI chat model, created on first use"""
+        return get_chat_llm(
+            temperature=0.2,  # Slightly creative for conversational responses
+            max_tokens=1500
+        )
+
+    @cached_property
+    def embeddings(self):
+        """Azure OpenAI embeddings for semantic search, created on first use"""
+        return get_embeddings()
+
+    @cached_property
+    def ddgs(self):
+        """DuckDuckGo search client, created on first use"""
+        return DDGS()
+
     def generate_suggestions(self, query: str, response: str, context: str) -> List[str]:
         """
         Generate follow-up suggestions based on the query and response.
@@ -138,7 +249,7 @@ Suggestions:
         """
         try:
             # Format the suggestions prompt
-            prompt_text = self.suggestions_prompt.format(
+            prompt_text = self._suggestions_template.format(
                 query=query,
                 response=response,
                 context=context[:1000]  # Limit context to avoid token limits
@@ -147,19 +258,54 @@ Suggestions:
             # Generate suggestions
             suggestions_response = self.llm.invoke(prompt_text)
 
-            # Parse JSON response
-            suggestions_text = suggestions_response.content.strip()
+        except Exception as e:
+            logger.error(f"Error generating suggestions: {e}")
+            return self._generate_fallback_suggestions(query)
+
+        return self._parse_suggestions(suggestions_response.content, query)
+
+    async def agenerate_suggestions(self, query: str, response: str, context: str) -> List[str]:
+        """
+        Async variant of generate_suggestions.
+
+        Args:
+            query: Original user query
+            response: AI response to the query
+            context: Available context information
+
+        Returns:
+            List of suggested follow-up questions
+        """
+        try:
+            prompt_text = self._suggestions_template.format(
+                query=query,
+                response=response,
+                context=context[:1000]  # Limit context to avoid token limits
+            )
+
+            async with AZURE_SEM.slot():
+                suggestions_response = await self.llm.ainvoke(prompt_text)
 
-            # Clean up the response if it has markdown formatting
-            if suggestions_text.startswith("```json"):
-                suggestions_text = suggestions_text[7:]
-            if suggestions_text.endswith("```"):
-                suggestions_text = suggestions_text[:-3]
+        except Exception as e:
+            logger.error(f"Error generating suggestions: {e}")
+            return self._generate_fallback_suggestions(query)
+
+        return self._parse_suggestions(suggestions_response.content, query)
 
-            suggestions_text = suggestions_text.strip()
+    def _parse_suggestions(self, content: str, query: str) -> List[str]:
+        """
+        Parse the raw LLM output into a list of suggestions.
 
-            # Parse JSON
-            suggestions = json.loads(suggestions_text)
+        Args:
+            content: Raw response content from the LLM
+            query: Original user query (used for fallback suggestions)
+
+        Returns:
+            List of suggested follow-up questions
+        """
+        try:
+            # Parse JSON, stripping any markdown code fence
+            suggestions = parse_llm_json(content)
 
             # Validate and return
             if isinstance(suggestions, list) and len(suggestions) >= 2:
@@ -182,43 +328,8 @@ Suggestions:
         Returns:
             List of fallback suggestions
         """
-        query_lower = query.lower()
-
-        # Common banking regulatory topics and their follow-up questions
-        topic_suggestions = {
-            "kyc": [
-                "What documents do I need for KYC verification?",
-                "How long does KYC verification usually take?",
-                "What happens if my KYC verification is delayed?"
-            ],
-            "compliance": [
-                "What are the main compliance requirements for my account?",
-                "How can I ensure I'm meeting all compliance standards?",
-                "Who can I contact for compliance-related questions?"
-            ],
-            "account": [
-                "What types of accounts are affected by these changes?",
-                "How do these changes affect my existing account?",
-                "Are there any fees associated with account updates?"
-            ],
-            "deadline": [
-                "What is the exact deadline for compliance?",
-                "What happens if I miss the deadline?",
-                "Are there any extensions available?"
-            ],
-            "default": [
-                "Can you explain this in simpler terms?",
-                "What should I do next?",
-                "Who can I contact for more specific guidance?"
-            ]
-        }
-
-        # Find matching topic
-        for topic, suggestions in topic_suggestions.items():
-            if topic in query_lower and topic != "default":
-                return suggestions
-
-        return topic_suggestions["default"]
+        match = _TOPIC_PATTERN.search(query.lower())
+        return list(_TOPIC_SUGGESTIONS[match.group(0) if match else "default"])
 
     def clean_markdown_formatting(self, text: str) -> str:
         """
@@ -231,29 +342,27 @@ Suggestions:
         Returns:
             Clean text without markdown symbols
         """
-        import re
-
         # Remove markdown headers but keep the text (### Header -> Header)
-        text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
+        text = _MD_HEADER.sub('', text)
 
         # Remove markdown bold/italic (**text** -> text, *text* -> text)
-        text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-        text = re.sub(r'\*(.*?)\*', r'\1', text)
+        text = _MD_BOLD.sub(r'\1', text)
+        text = _MD_ITALIC.sub(r'\1', text)
 
         # Remove markdown links [text](url) -> text
-        text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+        text = _MD_LINK.sub(r'\1', text)
 
         # Remove markdown code blocks but keep the content
-        text = re.sub(r'```[^\n]*\n(.*?)\n```', r'\1', text, flags=re.DOTALL)
+        text = _MD_CODE_BLOCK.sub(r'\1', text)
 
         # Remove inline code backticks (`code` -> code)
-        text = re.sub(r'`([^`]+)`', r'\1', text)
+        text = _MD_INLINE_CODE.sub(r'\1', text)
 
         # Clean up excessive whitespace but preserve paragraph structure
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _MD_EXCESS_NEWLINES.sub('\n\n', text)
 
         # Remove horizontal rules (--- or ***)
-        text = re.sub(r'^[-*_]{3,}$', '', text, flags=re.MULTILINE)
+        text = _MD_HORIZONTAL_RULE.sub('', text)
 
         return text.strip()
 
@@ -272,6 +381,14 @@ Suggestions:
             # Check if query requires real-time search
             needs_search = self._should_search_realtime(query)
 
+            # Serve repeated questions from the cache
+            use_cache = self._use_response_cache(needs_search)
+            query_embedding = None
+            if use_cache:
+                cached, query_embedding = self._get_cached_response(query)
+                if cached is not None:
+                    return self._serve_cached_response(query, cached, user_id)
+
             # Get real-time search results if needed
             search_results = ""
             if needs_search:
@@ -280,16 +397,8 @@ Suggestions:
             # Get relevant context from knowledge base
             context = self._get_relevant_context(query)
 
-            # Get conversation history
-            chat_history = self._get_formatted_history()
-
             # Format the prompt
-            prompt_text = self.query_prompt.format(
-                query=query,
-                context=context,
-                chat_history=chat_history,
-                search_results=search_results
-            )
+            prompt_text = self._build_query_prompt(query, context, search_results)
 
             # Generate response
             response = self.llm.invoke(prompt_text)
@@ -303,16 +412,12 @@ Suggestions:
             # Generate follow-up suggestions
             suggestions = self.generate_suggestions(query, cleaned_answer, self.clean_markdown_formatting(context))
 
-            # Prepare response metadata
-            response_metadata = {
-                "query": query,
-                "answer": cleaned_answer,
-                "suggestions": suggestions,
-                "timestamp": datetime.now().isoformat(),
-                "used_realtime_search": needs_search,
-                "context_sources": len(context.split('\n\n')) if context else 0,
-                "user_id": user_id
-            }
+            response_metadata = self._build_response_metadata(
+                query, cleaned_answer, suggestions, needs_search, context, user_id
+            )
+
+            if use_cache:
+                self.response_cache.add(query, query_embedding, response_metadata)
 
             logger.info(f"Answered query for user {user_id}: {query[:50]}...")
             return response_metadata
@@ -321,6 +426,338 @@ Suggestions:
             logger.error(f"Error answering query: {e}")
             return self._generate_error_response(query, str(e))
 
+    async def aanswer_query(self, query: str, user_id: str = "default") -> Dict[str, Any]:
+        """
+        Async variant of answer_query. Real-time search and knowledge-base
+        retrieval have no data dependency, so they run concurrently.
+
+        Args:
+            query: User's question
+            user_id: Unique identifier for the user (for conversation tracking)
+
+        Returns:
+            Dictionary containing the answer and metadata
+        """
+        try:
+            needs_search = self._should_search_realtime(query)
+
+            use_cache = self._use_response_cache(needs_search)
+            query_embedding = None
+            if use_cache:
+                cached, query_embedding = await self._aget_cached_response(query)
+                if cached is not None:
+                    return self._serve_cached_response(query, cached, user_id)
+
+            context, search_results = await self._agather_context(query, needs_search)
+
+            prompt_text = self._build_query_prompt(query, context, search_results)
+
+            async with AZURE_SEM.slot():
+                response = await self.llm.ainvoke(prompt_text)
+
+            self._update_memory(query, response.content)
+
+            cleaned_answer = self.clean_markdown_formatting(response.content)
+
+            suggestions = await self.agenerate_suggestions(query, cleaned_answer, self.clean_markdown_formatting(context))
+
+            response_metadata = self._build_response_metadata(
+                query, cleaned_answer, suggestions, needs_search, context, user_id
+            )
+
+            if use_cache:
+                self.response_cache.add(query, query_embedding, response_metadata)
+
+            logger.info(f"Answered query for user {user_id}: {query[:50]}...")
+            return response_metadata
+
+        except Exception as e:
+            logger.error(f"Error answering query: {e}")
+            return self._generate_error_response(query, str(e))
+
+    async def answer_query_stream(self, query: str, user_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a user query, streaming the answer as the model produces it.
+
+        Yields {"type": "token", "content": ...} events carrying raw model
+        text, then a single {"type": "done", "response": ...} event whose
+        response has the same shape as aanswer_query (cleaned answer,
+        suggestions and metadata). Suggestion generation starts once the
+        first part of the answer has arrived, overlapping with the stream.
+
+        Args:
+            query: User's question
+            user_id: Unique identifier for the user (for conversation tracking)
+
+        Yields:
+            Token events followed by a final done event
+        """
+        suggestions_task = None
+        try:
+            needs_search = self._should_search_realtime(query)
+
+            use_cache = self._use_response_cache(needs_search)
+            query_embedding = None
+            if use_cache:
+                cached, query_embedding = await self._aget_cached_response(query)
+                if cached is not None:
+                    response_metadata = self._serve_cached_response(query, cached, user_id)
+                    yield {"type": "token", "content": response_metadata["answer"]}
+                    yield {"type": "done", "response": response_metadata}
+                    return
+
+            context, search_results = await self._agather_context(query, needs_search)
+            cleaned_context = self.clean_markdown_formatting(context)
+
+            prompt_text = self._build_query_prompt(query, context, search_results)
+
+            chunks = []
+            streamed_chars = 0
+            async with AZURE_SEM.slot():
+                async for chunk in self.llm.astream(prompt_text):
+                    if not chunk.content:
+                        continue
+
+                    chunks.append(chunk.content)
+                    streamed_chars += len(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+
+                    if suggestions_task is None and streamed_chars >= _SUGGESTIONS_HEAD_START_CHARS:
+                        partial_answer = self.clean_markdown_formatting("".join(chunks))
+                        suggestions_task = asyncio.create_task(
+                            self.agenerate_suggestions(query, partial_answer, cleaned_context)
+                        )
+
+            answer = "".join(chunks)
+            self._update_memory(query, answer)
+
+            cleaned_answer = self.clean_markdown_formatting(answer)
+
+            if suggestions_task is None:
+                suggestions = await self.agenerate_suggestions(query, cleaned_answer, cleaned_context)
+            else:
+                suggestions = await suggestions_task
+
+            response_metadata = self._build_response_metadata(
+                query, cleaned_answer, suggestions, needs_search, context, user_id
+            )
+
+            if use_cache:
+                self.response_cache.add(query, query_embedding, response_metadata)
+
+            logger.info(f"Streamed answer for user {user_id}: {query[:50]}...")
+            yield {"type": "done", "response": response_metadata}
+
+        except Exception as e:
+            logger.error(f"Error answering query: {e}")
+            yield {"type": "done", "response": self._generate_error_response(query, str(e))}
+
+        finally:
+            # The consumer may stop iterating early
+            if suggestions_task is not None and not suggestions_task.done():
+                suggestions_task.cancel()
+
+    async def _agather_context(self, query: str, needs_search: bool) -> Tuple[str, str]:
+        """
+        Fetch knowledge-base context and, if needed, real-time search results
+        at the same time.
+
+        Args:
+            query: User's question
+            needs_search: Whether real-time search should be performed
+
+        Returns:
+            Tuple of (context, search_results)
+        """
+        search_task = asyncio.create_task(self._arealtime_search(query)) if needs_search else None
+
+        # Embed on the event loop (batched, within the Azure limit) and hand the
+        # vector to the FAQ search below, so its worker thread neither blocks on
+        # an HTTP call nor touches the embedding LRU
+        query_embedding = None
+        if self.knowledge_base.vector_store.embeddings:
+            try:
+                query_embedding = await self._aembed_query(query)
+            except Exception as e:
+                logger.error(f"Error embedding query for context lookup: {e}")
+
+        context = await asyncio.to_thread(self._get_relevant_context, query, query_embedding)
+        search_results = await search_task if search_task else ""
+        return context, search_results
+
+    def _use_response_cache(self, needs_search: bool) -> bool:
+        """
+        Whether a query's answer may be served from and stored in the response
+        cache. Answers to follow-ups depend on the conversation so far, so only
+        questions asked without history are cached; time-sensitive queries
+        always refresh.
+        """
+        return not needs_search and not self._history_lines
+
+    def _get_cached_response(self, query: str) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Look up a cached answer, trying an exact match before embedding the query.
+
+        Args:
+            query: User's question
+
+        Returns:
+            Tuple of (cached response or None, query embedding or None)
+        """
+        cached = self.response_cache.get_exact(query)
+        if cached is not None:
+            return cached, None
+
+        try:
+            query_embedding = self._embed_query(query)
+        except Exception as e:
+            logger.error(f"Error embedding query for cache lookup: {e}")
+            return None, None
+
+        return self.response_cache.get_similar(query_embedding), query_embedding
+
+    async def _aget_cached_response(self, query: str) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """
+        Async variant of _get_cached_response.
+
+        Args:
+            query: User's question
+
+        Returns:
+            Tuple of (cached response or None, query embedding or None)
+        """
+        cached = self.response_cache.get_exact(query)
+        if cached is not None:
+            return cached, None
+
+        try:
+            query_embedding = await self._aembed_query(query)
+        except Exception as e:
+            logger.error(f"Error embedding query for cache lookup: {e}")
+            return None, None
+
+        return self.response_cache.get_similar(query_embedding), query_embedding
+
+    def _embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the embedding if the same text was seen recently.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Embedding vector
+        """
+        embedding = self._recall_embedding(query)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self._remember_embedding(query, embedding)
+        return embedding
+
+    async def _aembed_query(self, query: str) -> List[float]:
+        """
+        Async variant of _embed_query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Embedding vector
+        """
+        embedding = self._recall_embedding(query)
+        if embedding is None:
+            embedding = await self.embedding_batcher.embed(query)
+            self._remember_embedding(query, embedding)
+        return embedding
+
+    async def _aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in one API call, within the shared Azure concurrency limit"""
+        async with AZURE_SEM.slot():
+            return await self.embeddings.aembed_documents(texts)
+
+    def _recall_embedding(self, query: str) -> Optional[List[float]]:
+        """Get a stored query embedding, marking it as recently used"""
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+            return embedding
+
+    def _remember_embedding(self, query: str, embedding: List[float]):
+        """Store a query embedding, evicting the least recently used entry when full"""
+        with self._query_embeddings_lock:
+            self._query_embeddings[query] = embedding
+            if len(self._query_embeddings) > self._query_embeddings_max_size:
+                self._query_embeddings.popitem(last=False)
+
+    def _serve_cached_response(self, query: str, cached: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+        """
+        Build a response from a cached answer, skipping the LLM entirely.
+
+        Args:
+            query: User's question
+            cached: Cached response metadata
+            user_id: Unique identifier for the user
+
+        Returns:
+            Response metadata dictionary
+        """
+        self._update_memory(query, cached["answer"])
+
+        logger.info(f"Served cached answer for user {user_id}: {query[:50]}...")
+        return {
+            **cached,
+            "query": query,
+            "timestamp": datetime.now().isoformat(),
+            "user_id": user_id,
+            "cached": True
+        }
+
+    def _build_query_prompt(self, query: str, context: str, search_results: str) -> str:
+        """
+        Format the query prompt with the current conversation history.
+
+        Args:
+            query: User's question
+            context: Knowledge-base context
+            search_results: Formatted real-time search results
+
+        Returns:
+            Prompt text for the LLM
+        """
+        return self._query_template.format(
+            query=query,
+            context=context,
+            chat_history=self._get_formatted_history(),
+            search_results=search_results
+        )
+
+    def _build_response_metadata(self, query: str, answer: str, suggestions: List[str],
+                                 used_realtime_search: bool, context: str, user_id: str) -> Dict[str, Any]:
+        """
+        Prepare the response dictionary returned to callers.
+
+        Args:
+            query: User's question
+            answer: Cleaned answer text
+            suggestions: Follow-up suggestions
+            used_realtime_search: Whether real-time search was performed
+            context: Knowledge-base context used for the answer
+            user_id: Unique identifier for the user
+
+        Returns:
+            Response metadata dictionary
+        """
+        return {
+            "query": query,
+            "answer": answer,
+            "suggestions": suggestions,
+            "timestamp": datetime.now().isoformat(),
+            "used_realtime_search": used_realtime_search,
+            "context_sources": context.count('\n\n') + 1 if context else 0,
+            "user_id": user_id
+        }
+
     def _should_search_realtime(self, query: str) -> bool:
         """
         Determine if the query requires real-time search.
@@ -333,29 +770,8 @@ Suggestions:
         """
         query_lower = query.lower()
 
-        # Keywords that indicate need for recent information
-        realtime_keywords = [
-            "recent", "latest", "current", "new", "update", "change",
-            "today", "this week", "this month", "breaking", "news"
-        ]
-
-        # Check for temporal keywords
-        for keyword in realtime_keywords:
-            if keyword in query_lower:
-                return True
-
-        # Check for date-related patterns
-        date_patterns = [
-            r'\d{1,2}/\d{1,2}/\d{4}',  # MM/DD/YYYY
-            r'\d{4}-\d{1,2}-\d{1,2}',  # YYYY-MM-DD
-            r'\b(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+\d{4}\b'
-        ]
-
-        for pattern in date_patterns:
-            if re.search(pattern, query_lower):
-                return True
-
-        return False
+        # Check for temporal keywords or date-related patterns
+        return _REALTIME_PATTERN.search(query_lower) is not None
 
     def _perform_realtime_search(self, query: str) -> str:
         """
@@ -367,32 +783,92 @@ Suggestions:
         Returns:
             Formatted search results
         """
-        try:
-            # Enhance query for regulatory search
-            search_query = f"banking regulatory {query} site:.gov OR site:.org OR site:.com/banking"
+        # Skip the search entirely while a recent failure suggests DDGS is down
+        if time.monotonic() < self._search_unavailable_until:
+            return _SEARCH_UNAVAILABLE
+
+        # Enhance query for regulatory search
+        search_query = f"banking regulatory {query} site:.gov OR site:.org OR site:.com/banking"
 
+        with self._search_cache_lock:
+            cached = self._search_cache.get(search_query)
+        if cached is not None:
+            return cached
+
+        try:
             # Perform search
             results = list(self.ddgs.text(search_query, max_results=5))
 
             # Format results
-            formatted_results = "REAL-TIME SEARCH RESULTS:\n\n"
-            for i, result in enumerate(results, 1):
-                formatted_results += f"{i}. {result['title']}\n"
-                formatted_results += f"   Source: {result['href']}\n"
-                formatted_results += f"   Summary: {result['body'][:200]}...\n\n"
-
-            return formatted_results
+            parts = ["REAL-TIME SEARCH RESULTS:\n\n"]
+            parts.extend(
+                f"{i}. {result['title']}\n"
+                f"   Source: {result['href']}\n"
+                f"   Summary: {result['body'][:200]}...\n\n"
+                for i, result in enumerate(results, 1)
+            )
+            formatted_results = "".join(parts)
 
         except Exception as e:
             logger.error(f"Error performing real-time search: {e}")
-            return "Unable to perform real-time search at this time."
+            self._search_unavailable_until = time.monotonic() + _SEARCH_FAILURE_BACKOFF
+            return _SEARCH_UNAVAILABLE
+
+        with self._search_cache_lock:
+            self._search_cache[search_query] = formatted_results
+        return formatted_results
+
+    async def _arealtime_search(self, query: str) -> str:
+        """
+        Run the real-time search off the event loop, giving up after a timeout
+        so a slow search cannot hold up the answer.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Formatted search results, or an empty string on timeout
+        """
+        try:
+            return await asyncio.wait_for(
+                self._run_search_in_pool(query),
+                timeout=_REALTIME_SEARCH_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Real-time search timed out after {_REALTIME_SEARCH_TIMEOUT}s, answering without it")
+            return ""
+
+    async def _run_search_in_pool(self, query: str) -> str:
+        """
+        Run the blocking search on the shared DDGS thread pool. The semaphore
+        makes excess callers wait on the event loop, where the timeout can
+        still cancel them, rather than queueing inside the executor. A slot is
+        released only when its search thread finishes, so searches abandoned
+        on timeout still count against the limit while they run.
 
-    def _get_relevant_context(self, query: str) -> str:
+        Args:
+            query: Search query
+
+        Returns:
+            Formatted search results
+        """
+        await _DDGS_SEMAPHORE.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = _DDGS_POOL.submit(self._perform_realtime_search, query)
+        except BaseException:
+            _DDGS_SEMAPHORE.release()
+            raise
+        future.add_done_callback(lambda _: _release_ddgs_slot(loop))
+        return await asyncio.wrap_future(future)
+
+    def _get_relevant_context(self, query: str, query_embedding: Optional[List[float]] = None) -> str:
         """
         Get relevant context from the knowledge base.
 
         Args:
             query: User's query
+            query_embedding: Embedding of the query, if already computed
 
         Returns:
             Formatted context string
@@ -401,7 +877,8 @@ Suggestions:
             # Search FAQs
             faq_results = self.knowledge_base.search_faqs(
                 query=query,
-                embedding_func=self.embeddings.embed_query,
+                embedding_func=self._embed_query,
+                query_embedding=query_embedding,
                 top_k=3
             )
 
@@ -447,24 +924,10 @@ Suggestions:
         Returns:
             Formatted chat history string
         """
-        try:
-            history = self.memory.chat_memory.messages
-
-            if not history:
-                return "No previous conversation."
+        if not self._history_lines:
+            return "No previous conversation."
 
-            formatted_history = []
-            for msg in history[-6:]:  # Last 6 messages for context
-                if isinstance(msg, HumanMessage):
-                    formatted_history.append(f"User: {msg.content}")
-                elif isinstance(msg, AIMessage):
-                    formatted_history.append(f"Assistant: {msg.content}")
-
-            return "\n".join(formatted_history)
-
-        except Exception as e:
-            logger.error(f"Error formatting chat history: {e}")
-            return "Conversation history unavailable."
+        return "\n".join(self._history_lines)
 
     def _update_memory(self, query: str, response: str):
         """
@@ -477,6 +940,10 @@ Suggestions:
         try:
             self.memory.chat_memory.add_user_message(query)
             self.memory.chat_memory.add_ai_message(response)
+
+            self._history_lines.append(f"User: {query}")
+            self._history_lines.append(f"Assistant: {response}")
+            self._history_chars += len(query) + len(response)
         except Exception as e:
             logger.error(f"Error updating memory: {e}")
 
@@ -506,6 +973,11 @@ Suggestions:
             "context_sources": 0
         }
 
+    def clear_response_cache(self):
+        """Drop cached answers, e.g. after the knowledge base changes."""
+        self.response_cache.clear()
+        logger.info("Cleared query response cache")
+
     def clear_memory(self, user_id: str = "default"):
         """
         Clear conversation memory for a specific user.
@@ -515,6 +987,8 @@ Suggestions:
         """
         try:
             self.memory.clear()
+            self._history_lines.clear()
+            self._history_chars = 0
             logger.info(f"Cleared conversation memory for user {user_id}")
         except Exception as e:
             logger.error(f"Error clearing memory: {e}")
@@ -530,7 +1004,8 @@ Suggestions:
             messages = self.memory.chat_memory.messages
             return {
                 "total_messages": len(messages),
-                "conversation_length": len(" ".join([msg.content for msg in messages])),
+                # Length of all messages joined by single spaces, tracked incrementally
+                "conversation_length": self._history_chars + max(len(messages) - 1, 0),
                 "last_interaction": messages[-1].content if messages else None,
                 "timestamp": datetime.now().isoformat()
             }
@@ -1,41 +1,158 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Any
-from langchain_openai import AzureChatOpenAI
-from langchain.prompts import PromptTemplate
-from config.azure_config import AZURE_OPENAI_CONFIG
+import sys
+import threading
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from functools import cached_property, lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+from langchain.prompts import ChatPromptTemplate
+from utils.azure_clients import AZURE_SEM, get_chat_llm
+from utils.json_utils import dumps_json, parse_llm_json, parse_partial_json_object
+from utils.prompt_compression import compress_text
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 logger = logging.getLogger(__name__)
 
-class ValidationAgent:
-    """
-    Agent responsible for validating FAQs for accuracy and compliance.
-    Simulates expert feedback from risk and legal experts.
-    """
+# Expert personas consulted by the validation workflow, as keyed in the panel response
+_EXPERT_PERSONAS = ("legal", "risk", "customer")
 
-    def __init__(self):
-        self.llm = AzureChatOpenAI(
-            azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
-            azure_deployment=AZURE_OPENAI_CONFIG["gpt_deployment"],
-            api_version=AZURE_OPENAI_CONFIG["api_version"],
-            api_key=AZURE_OPENAI_CONFIG["api_key"],
-            temperature=0.1,  # Very low temperature for consistent validation
-            max_tokens=1500
-        )
+# The panel review returns feedback for all three personas in one response
+_PANEL_MAX_TOKENS = 4000
 
-        # Define the validation prompt
-        self.validation_prompt = PromptTemplate(
-            input_variables=["faqs", "regulatory_text", "expertise_area"],
-            template="""
-You are a senior regulatory compliance expert with extensive experience in banking regulations and risk management. Your role is to validate FAQs generated about regulatory changes to ensure accuracy, completeness, and compliance with legal requirements.
+# Cache key label for the single-call panel review
+_PANEL_REVIEW = "expert_panel"
 
-REGULATORY TEXT:
-{regulatory_text}
+# Validation results are reused for identical inputs within this window (seconds)
+_VALIDATION_CACHE_TTL = 86400
 
-GENERATED FAQs TO VALIDATE:
-{faqs}
+# Recommendation rules: (condition on the validation summary, message or message builder)
+_RECOMMENDATION_RULES = (
+    (lambda summary: summary["approval_rate"] < 80,
+     "Majority of FAQs need revision. Consider regenerating with more specific regulatory details."),
+    (lambda summary: summary["high_risk_issues"] > 0,
+     lambda summary: f"Found {summary['high_risk_issues']} high-risk issues. Immediate legal review required."),
+    (lambda summary: summary["average_accuracy_score"] < 7,
+     "Average accuracy score is below acceptable threshold. Enhance regulatory text analysis."),
+)
+
+def _default_feedback() -> Dict[str, Any]:
+    """Default values for feedback fields the model may omit, with lists of their own"""
+    return {
+        "approved": False,
+        "accuracy_score": 5,
+        "issues": [],
+        "suggestions": [],
+        "risk_level": "medium",
+        "notes": ""
+    }
+
+
+def _fallback_feedback() -> Dict[str, Any]:
+    """Review given when the LLM review is unavailable, with lists of its own"""
+    return {
+        "approved": True,  # Default to approved for fallback
+        "accuracy_score": 7,  # Moderate score
+        "issues": [],
+        "suggestions": ["Consider consulting with legal experts for final review"],
+        "risk_level": "medium",
+        "notes": "Automated validation completed. Manual expert review recommended."
+    }
+
+
+def _normalize_feedback(feedback: Any) -> Dict[str, Any]:
+    """Fill in the fields an expert review omitted; anything but an object counts as empty"""
+    return {**_default_feedback(), **feedback} if isinstance(feedback, dict) else _default_feedback()
+
+
+def _normalize_panel_review(review: Any) -> Dict[str, Dict[str, Any]]:
+    """Normalize the legal, risk and customer reviews of one FAQ"""
+    if not isinstance(review, dict):
+        review = {}
+    return {persona: _normalize_feedback(review.get(persona)) for persona in _EXPERT_PERSONAS}
+
+
+@lru_cache(maxsize=32)
+def _faq_keys(count: int) -> Tuple[str, ...]:
+    """Feedback keys ("faq_0", "faq_1", ...) for a list of FAQs, built once per length"""
+    return tuple(sys.intern(f"faq_{i}") for i in range(count))
+
+
+def _dedupe_faqs(faqs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Drop repeated FAQs so each distinct FAQ is only reviewed once.
+
+    Args:
+        faqs: FAQs to validate
+
+    Returns:
+        Unique FAQs, and for every original FAQ the position of its unique copy
+    """
+    unique_positions = {}
+    unique_faqs = []
+    positions = []
+    for faq in faqs:
+        key = orjson.dumps(faq, option=orjson.OPT_SORT_KEYS)
+        position = unique_positions.get(key)
+        if position is None:
+            position = unique_positions[key] = len(unique_faqs)
+            unique_faqs.append(faq)
+        positions.append(position)
+    return unique_faqs, positions
+
+
+def _fan_out_feedback(feedback: Dict[str, Any], positions: List[int]) -> Dict[str, Any]:
+    """Map feedback for the unique FAQs back onto the original FAQ positions"""
+    # The last FAQ maps to its own position only when there were no duplicates
+    if not positions or positions[-1] == len(positions) - 1:
+        return feedback
+    keys = _faq_keys(len(positions))
+    return {
+        keys[i]: feedback[keys[position]]
+        for i, position in enumerate(positions)
+        if keys[position] in feedback
+    }
+
+
+# Batches at least this large are summarized with the compiled kernel, which
+# only pays off once its per-element savings outweigh the call overhead
+_NUMBA_MIN_BATCH = 1000
+
+
+def _summarize_feedback(scores: np.ndarray, approved: np.ndarray, high_risk: np.ndarray) -> Tuple[int, int, float]:
+    """Count approved and high-risk entries and average the accuracy scores"""
+    total = scores.shape[0]
+    approved_count = 0
+    high_risk_count = 0
+    score_sum = 0.0
+    for i in range(total):
+        if approved[i]:
+            approved_count += 1
+        if high_risk[i]:
+            high_risk_count += 1
+        score_sum += scores[i]
+    return approved_count, high_risk_count, score_sum / total if total > 0 else 0.0
+
+
+# Compiled on first use and cached on disk; None when numba is not installed
+_summarize_feedback_jit = njit(cache=True)(_summarize_feedback) if njit is not None else None
+
+# Prompts are split into a system message holding the static review
+# instructions followed by the regulatory text, and a human message
+# holding the FAQs and the requested expertise. Every review of the
+# same regulatory text therefore starts with an identical prefix,
+# which Azure OpenAI caches automatically across calls.
+_SYSTEM_TEMPLATE = """
+You are a senior regulatory compliance expert with extensive experience in banking regulations and risk management. Your role is to validate FAQs generated about regulatory changes to ensure accuracy, completeness, and compliance with legal requirements.
 
-As a {expertise_area} expert, review each FAQ for:
+Review each FAQ for:
 
 1. **Accuracy**: Does the answer correctly reflect the regulatory requirements?
 2. **Completeness**: Does it cover all necessary aspects of the regulation?
@@ -43,19 +160,15 @@ As a {expertise_area} expert, review each FAQ for:
 4. **Legal Compliance**: Does it avoid giving unauthorized legal advice?
 5. **Risk Assessment**: Does it properly address potential compliance risks?
 
-For each FAQ, provide validation feedback in the following JSON format:
+Feedback for a single FAQ uses the following JSON format:
 
 {{
-    "faq_0": {{
-        "approved": true/false,
-        "accuracy_score": 1-10,
-        "issues": ["list of specific issues found"],
-        "suggestions": ["specific improvement suggestions"],
-        "risk_level": "low/medium/high",
-        "notes": "Additional expert notes"
-    }},
-    "faq_1": {{...}},
-    ...
+    "approved": true/false,
+    "accuracy_score": 1-10,
+    "issues": ["list of specific issues found"],
+    "suggestions": ["specific improvement suggestions"],
+    "risk_level": "low/medium/high",
+    "notes": "Additional expert notes"
 }}
 
 Key validation criteria:
@@ -66,9 +179,96 @@ Key validation criteria:
 Be thorough but constructive. If a FAQ has critical errors, mark it as not approved. For minor issues, approve but provide suggestions for improvement.
 
 Return only the JSON validation feedback, no additional text.
+
+REGULATORY TEXT:
+{regulatory_text}
 """
+
+# Single-persona validation prompt
+_VALIDATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_TEMPLATE),
+    ("human", """
+GENERATED FAQs TO VALIDATE:
+{faqs}
+
+As a {expertise_area} expert, review each FAQ and return the feedback keyed by FAQ position:
+
+{{
+    "faq_0": {{...feedback...}},
+    "faq_1": {{...feedback...}},
+    ...
+}}
+""")
+])
+
+# Single-call review by all expert personas at once, so the regulatory
+# text is only sent once per workflow
+_PANEL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_TEMPLATE),
+    ("human", """
+GENERATED FAQs TO VALIDATE:
+{faqs}
+
+Review each FAQ three times, once from each of these expert perspectives:
+- "legal": Legal and Compliance expert
+- "risk": Risk Management expert
+- "customer": Customer Experience expert
+
+Return the feedback of all three experts keyed by FAQ position:
+
+{{
+    "faq_0": {{
+        "legal": {{...feedback...}},
+        "risk": {{...feedback...}},
+        "customer": {{...feedback...}}
+    }},
+    "faq_1": {{...same structure...}},
+    ...
+}}
+""")
+])
+
+class ValidationAgent:
+    """
+    Agent responsible for validating FAQs for accuracy and compliance.
+    Simulates expert feedback from risk and legal experts.
+    """
+
+    def __init__(self, compress_regulatory_text: bool = False, compression_rate: float = 0.5):
+        """
+        Initialize the validation agent.
+
+        Args:
+            compress_regulatory_text: Compress the regulatory text with LLMLingua
+                before it is sent to the LLM (requires the optional llmlingua package)
+            compression_rate: Fraction of regulatory text tokens kept when compressing
+        """
+        self.compress_regulatory_text = compress_regulatory_text
+        self.compression_rate = compression_rate
+
+        # Feedback keyed by a hash of (faqs, regulatory_text, review); the sync
+        # API may be called from worker threads, so access is guarded by a lock
+        self._validation_cache = TTLCache(maxsize=256, ttl=_VALIDATION_CACHE_TTL)
+        self._validation_cache_lock = threading.Lock()
+
+        # Prompts are parsed once at import and shared by all instances
+        self.validation_prompt = _VALIDATION_PROMPT
+        self.panel_prompt = _PANEL_PROMPT
+
+    @cached_property
+    def llm(self):
+        """Azure OpenAI chat model in JSON mode, created on first use"""
+        return get_chat_llm(
+            temperature=0.1,  # Very low temperature for consistent validation
+            max_tokens=1500,
+            json_mode=True
         )
 
+    @cached_property
+    def panel_llm(self):
+        """Chat model for panel reviews, which return feedback from all experts at once"""
+        return get_chat_llm(temperature=0.1, max_tokens=_PANEL_MAX_TOKENS, json_mode=True)
+
     def validate_faqs(self, faqs: List[Dict[str, Any]], regulatory_text: str, expertise_area: str = "Regulatory Compliance") -> Dict[str, Any]:
         """
         Validate FAQs for accuracy and compliance.
@@ -81,44 +281,107 @@ Return only the JSON validation feedback, no additional text.
         Returns:
             Dictionary containing validation feedback for each FAQ
         """
-        try:
-            # Format FAQs for the prompt
-            faqs_text = json.dumps(faqs, indent=2)
-
-            # Format the validation prompt
-            prompt_text = self.validation_prompt.format(
-                faqs=faqs_text,
-                regulatory_text=regulatory_text,
-                expertise_area=expertise_area
-            )
-
-            # Get validation feedback from LLM
-            response = self.llm.invoke(prompt_text)
+        if not faqs:
+            return {}
+
+        # Review each distinct FAQ once and fan the feedback back out
+        unique_faqs, positions = _dedupe_faqs(faqs)
+
+        cache_key = f"{self._inputs_digest(unique_faqs, regulatory_text)}:{expertise_area}"
+        feedback = self._get_cached_validation(cache_key)
+
+        if feedback is None:
+            try:
+                # Format the validation prompt
+                messages = self.validation_prompt.format_messages(
+                    faqs=dumps_json(unique_faqs, indent=True),
+                    regulatory_text=self._prepare_regulatory_text(regulatory_text),
+                    expertise_area=expertise_area
+                )
+
+                # Get validation feedback from LLM
+                response = self.llm.invoke(messages)
+                feedback = self._parse_validation_response(response.content, unique_faqs, cache_key)
+            except Exception as e:
+                logger.error(f"Error validating FAQs: {e}")
+                feedback = self._generate_fallback_validation(unique_faqs)
+
+        return _fan_out_feedback(feedback, positions)
+
+    async def avalidate_faqs(self, faqs: List[Dict[str, Any]], regulatory_text: str, expertise_area: str = "Regulatory Compliance") -> Dict[str, Any]:
+        """
+        Async variant of validate_faqs.
 
-            # Parse the JSON response
-            validation_json = response.content.strip()
+        Args:
+            faqs: List of FAQ dictionaries to validate
+            regulatory_text: Original regulatory text for reference
+            expertise_area: Area of expertise for validation
 
-            # Clean up the response if it has markdown formatting
-            if validation_json.startswith("```json"):
-                validation_json = validation_json[7:]
-            if validation_json.endswith("```"):
-                validation_json = validation_json[:-3]
+        Returns:
+            Dictionary containing validation feedback for each FAQ
+        """
+        if not faqs:
+            return {}
+
+        # Review each distinct FAQ once and fan the feedback back out
+        unique_faqs, positions = _dedupe_faqs(faqs)
+
+        cache_key = f"{self._inputs_digest(unique_faqs, regulatory_text)}:{expertise_area}"
+        feedback = self._get_cached_validation(cache_key)
+
+        if feedback is None:
+            try:
+                messages = self.validation_prompt.format_messages(
+                    faqs=dumps_json(unique_faqs, indent=True),
+                    regulatory_text=await self._aprepare_regulatory_text(regulatory_text),
+                    expertise_area=expertise_area
+                )
+                async with AZURE_SEM.slot(background=True):
+                    response = await self.llm.ainvoke(messages)
+                feedback = self._parse_validation_response(response.content, unique_faqs, cache_key)
+            except Exception as e:
+                logger.error(f"Error validating FAQs: {e}")
+                feedback = self._generate_fallback_validation(unique_faqs)
+
+        return _fan_out_feedback(feedback, positions)
+
+    def _parse_validation_response(self, content: str, faqs: List[Dict[str, Any]], cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse the raw LLM output into validation feedback.
 
-            validation_json = validation_json.strip()
+        Args:
+            content: Raw response content from the LLM
+            faqs: FAQs that were validated (used for fallback feedback)
+            cache_key: Key to cache successfully parsed feedback under
 
-            # Parse JSON
-            validation_feedback = json.loads(validation_json)
+        Returns:
+            Dictionary containing validation feedback for each FAQ
+        """
+        try:
+            # Parse the JSON response
+            validation_feedback = parse_llm_json(content)
 
             # Validate the structure
             if not isinstance(validation_feedback, dict):
                 raise ValueError("Validation feedback must be a JSON object")
 
+            validation_feedback = {key: _normalize_feedback(value) for key, value in validation_feedback.items()}
+
             logger.info(f"Successfully validated {len(validation_feedback)} FAQs")
+            if cache_key is not None:
+                self._cache_validation(cache_key, validation_feedback)
             return validation_feedback
 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse validation JSON: {e}")
-            logger.error(f"Raw response: {response.content}")
+
+            # Keep the feedback for FAQs that were complete before a truncation
+            recovered = {key: _normalize_feedback(value) for key, value in parse_partial_json_object(content).items() if isinstance(value, dict)}
+            if recovered:
+                logger.info(f"Recovered validation feedback for {len(recovered)} FAQs from a partial response")
+                return {**self._generate_fallback_validation(faqs), **recovered}
+
+            logger.error(f"Raw response: {content}")
             return self._generate_fallback_validation(faqs)
 
         except Exception as e:
@@ -137,19 +400,7 @@ Return only the JSON validation feedback, no additional text.
         """
         logger.info("Generating fallback validation feedback")
 
-        validation_feedback = {}
-
-        for i, faq in enumerate(faqs):
-            validation_feedback[f"faq_{i}"] = {
-                "approved": True,  # Default to approved for fallback
-                "accuracy_score": 7,  # Moderate score
-                "issues": [],
-                "suggestions": ["Consider consulting with legal experts for final review"],
-                "risk_level": "medium",
-                "notes": "Automated validation completed. Manual expert review recommended."
-            }
-
-        return validation_feedback
+        return {faq_key: _fallback_feedback() for faq_key in _faq_keys(len(faqs))}
 
     def get_validation_summary(self, validation_feedback: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -161,21 +412,21 @@ Return only the JSON validation feedback, no additional text.
         Returns:
             Summary statistics and insights
         """
-        total_faqs = len(validation_feedback)
-        approved_count = 0
-        high_risk_count = 0
-        avg_accuracy = 0
-
-        for feedback in validation_feedback.values():
-            if feedback.get("approved", False):
-                approved_count += 1
-
-            if feedback.get("risk_level") == "high":
-                high_risk_count += 1
-
-            avg_accuracy += feedback.get("accuracy_score", 5)
+        feedbacks = list(validation_feedback.values())
+        total_faqs = len(feedbacks)
+
+        if _summarize_feedback_jit is not None and total_faqs >= _NUMBA_MIN_BATCH:
+            approved_count, high_risk_count, avg_accuracy = _summarize_feedback_jit(
+                np.fromiter((feedback.get("accuracy_score", 5) for feedback in feedbacks), dtype=np.float64, count=total_faqs),
+                np.fromiter((bool(feedback.get("approved", False)) for feedback in feedbacks), dtype=np.bool_, count=total_faqs),
+                np.fromiter((feedback.get("risk_level") == "high" for feedback in feedbacks), dtype=np.bool_, count=total_faqs)
+            )
+        else:
+            approved_count = sum(1 for feedback in feedbacks if feedback.get("approved", False))
+            high_risk_count = sum(1 for feedback in feedbacks if feedback.get("risk_level") == "high")
 
-        avg_accuracy = avg_accuracy / total_faqs if total_faqs > 0 else 0
+            scores = np.fromiter((feedback.get("accuracy_score", 5) for feedback in feedbacks), dtype=np.float64, count=total_faqs)
+            avg_accuracy = float(scores.mean()) if total_faqs > 0 else 0
 
         return {
             "total_faqs": total_faqs,
@@ -190,6 +441,9 @@ Return only the JSON validation feedback, no additional text.
         """
         Simulate a complete expert validation workflow.
 
+        The legal, risk and customer experts review all FAQs in a single LLM
+        call, so the regulatory text is only sent once.
+
         Args:
             faqs: FAQs to validate
             regulatory_text: Original regulatory text
@@ -197,30 +451,249 @@ Return only the JSON validation feedback, no additional text.
         Returns:
             Complete validation results including summary
         """
+        if not faqs:
+            return self._empty_workflow_result()
+
         logger.info("Starting expert validation workflow...")
 
-        # Step 1: Legal compliance validation
-        legal_feedback = self.validate_faqs(faqs, regulatory_text, "Legal and Compliance")
+        # Review each distinct FAQ once and fan the feedback back out
+        unique_faqs, positions = _dedupe_faqs(faqs)
+        panel_feedback = self._review_panel(unique_faqs, regulatory_text)
+
+        return self._build_workflow_result(faqs, _fan_out_feedback(panel_feedback, positions))
+
+    async def asimulate_expert_workflow(self, faqs: List[Dict[str, Any]], regulatory_text: str) -> Dict[str, Any]:
+        """
+        Async variant of simulate_expert_workflow.
+
+        Args:
+            faqs: FAQs to validate
+            regulatory_text: Original regulatory text
+
+        Returns:
+            Complete validation results including summary
+        """
+        if not faqs:
+            return self._empty_workflow_result()
+
+        logger.info("Starting expert validation workflow...")
+
+        # Review each distinct FAQ once and fan the feedback back out
+        unique_faqs, positions = _dedupe_faqs(faqs)
+        panel_feedback = await self._areview_panel(unique_faqs, regulatory_text)
+
+        return self._build_workflow_result(faqs, _fan_out_feedback(panel_feedback, positions))
+
+    def validate_faq(self, faq: Dict[str, Any], regulatory_text: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Review a single FAQ with the legal, risk and customer experts.
+
+        Args:
+            faq: FAQ to validate
+            regulatory_text: Original regulatory text
+
+        Returns:
+            Normalized legal, risk and customer feedback for the FAQ
+        """
+        return self._review_panel([faq], regulatory_text)["faq_0"]
+
+    async def avalidate_faq(self, faq: Dict[str, Any], regulatory_text: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Async variant of validate_faq.
+
+        Args:
+            faq: FAQ to validate
+            regulatory_text: Original regulatory text
 
-        # Step 2: Risk management validation
-        risk_feedback = self.validate_faqs(faqs, regulatory_text, "Risk Management")
+        Returns:
+            Normalized legal, risk and customer feedback for the FAQ
+        """
+        return (await self._areview_panel([faq], regulatory_text))["faq_0"]
 
-        # Step 3: Customer impact validation
-        customer_feedback = self.validate_faqs(faqs, regulatory_text, "Customer Experience")
+    def _review_panel(self, faqs: List[Dict[str, Any]], regulatory_text: str) -> Dict[str, Any]:
+        """
+        Review FAQs with all experts in one LLM call.
+
+        Args:
+            faqs: Distinct FAQs to validate
+            regulatory_text: Original regulatory text
+
+        Returns:
+            Dictionary mapping each FAQ key to its legal, risk and customer feedback
+        """
+        cache_key = f"{self._inputs_digest(faqs, regulatory_text)}:{_PANEL_REVIEW}"
+        panel_feedback = self._get_cached_validation(cache_key)
+
+        if panel_feedback is None:
+            try:
+                messages = self.panel_prompt.format_messages(
+                    faqs=dumps_json(faqs, indent=True),
+                    regulatory_text=self._prepare_regulatory_text(regulatory_text)
+                )
+                response = self.panel_llm.invoke(messages)
+                panel_feedback = self._parse_panel_response(response.content, faqs, cache_key)
+            except Exception as e:
+                logger.error(f"Error running panel validation: {e}")
+                panel_feedback = self._generate_fallback_panel_validation(faqs)
+
+        return panel_feedback
+
+    async def _areview_panel(self, faqs: List[Dict[str, Any]], regulatory_text: str) -> Dict[str, Any]:
+        """
+        Async variant of _review_panel.
+
+        Args:
+            faqs: Distinct FAQs to validate
+            regulatory_text: Original regulatory text
 
+        Returns:
+            Dictionary mapping each FAQ key to its legal, risk and customer feedback
+        """
+        cache_key = f"{self._inputs_digest(faqs, regulatory_text)}:{_PANEL_REVIEW}"
+        panel_feedback = self._get_cached_validation(cache_key)
+
+        if panel_feedback is None:
+            try:
+                messages = self.panel_prompt.format_messages(
+                    faqs=dumps_json(faqs, indent=True),
+                    regulatory_text=await self._aprepare_regulatory_text(regulatory_text)
+                )
+                async with AZURE_SEM.slot(background=True):
+                    response = await self.panel_llm.ainvoke(messages)
+                panel_feedback = self._parse_panel_response(response.content, faqs, cache_key)
+            except Exception as e:
+                logger.error(f"Error running panel validation: {e}")
+                panel_feedback = self._generate_fallback_panel_validation(faqs)
+
+        return panel_feedback
+
+    @staticmethod
+    def _inputs_digest(faqs: List[Dict[str, Any]], regulatory_text: str) -> str:
+        """Content hash of the inputs to a review, used to build validation cache keys"""
+        return hashlib.blake2b(orjson.dumps([faqs, regulatory_text]), digest_size=16).hexdigest()
+
+    def _get_cached_validation(self, cache_key: str) -> Optional[Any]:
+        """Look up previously computed validation feedback"""
+        with self._validation_cache_lock:
+            cached = self._validation_cache.get(cache_key)
+
+        if cached is not None:
+            logger.info("Reusing cached validation feedback")
+        return cached
+
+    def _cache_validation(self, cache_key: str, feedback: Any):
+        """Store validation feedback for identical future reviews"""
+        with self._validation_cache_lock:
+            self._validation_cache[cache_key] = feedback
+
+    def _prepare_regulatory_text(self, regulatory_text: str) -> str:
+        """Return the regulatory text as it should appear in prompts, compressed if enabled"""
+        if not self.compress_regulatory_text:
+            return regulatory_text
+        return compress_text(regulatory_text, self.compression_rate)
+
+    async def _aprepare_regulatory_text(self, regulatory_text: str) -> str:
+        """Async variant of _prepare_regulatory_text; compression runs off the event loop"""
+        if not self.compress_regulatory_text:
+            return regulatory_text
+        return await asyncio.to_thread(compress_text, regulatory_text, self.compression_rate)
+
+    def _parse_panel_response(self, content: str, faqs: List[Dict[str, Any]], cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse a panel review response into per-FAQ expert feedback.
+
+        Args:
+            content: Raw response content from the LLM
+            faqs: FAQs that were validated (used for fallback feedback)
+            cache_key: Key to cache successfully parsed feedback under
+
+        Returns:
+            Dictionary mapping each FAQ key to its legal, risk and customer feedback
+        """
+        try:
+            panel_feedback = parse_llm_json(content)
+
+            if not isinstance(panel_feedback, dict):
+                raise ValueError("Panel validation feedback must be a JSON object")
+
+            panel_feedback = {key: _normalize_panel_review(value) for key, value in panel_feedback.items()}
+
+            # FAQs the response has no feedback for (e.g. keyed differently) get
+            # the fallback review, and the incomplete result is not cached
+            missing = [key for key in _faq_keys(len(faqs)) if key not in panel_feedback]
+            if missing:
+                logger.warning(f"Panel validation feedback is missing {', '.join(missing)}")
+                return {**self._generate_fallback_panel_validation(faqs), **panel_feedback}
+
+            logger.info(f"Successfully validated {len(panel_feedback)} FAQs with all experts")
+            if cache_key is not None:
+                self._cache_validation(cache_key, panel_feedback)
+            return panel_feedback
+
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse panel validation JSON: {e}")
+
+            # Keep the feedback for FAQs that were complete before a truncation
+            recovered = {key: _normalize_panel_review(value) for key, value in parse_partial_json_object(content).items() if isinstance(value, dict)}
+            if recovered:
+                logger.info(f"Recovered panel feedback for {len(recovered)} FAQs from a partial response")
+                return {**self._generate_fallback_panel_validation(faqs), **recovered}
+
+            logger.error(f"Raw response: {content}")
+            return self._generate_fallback_panel_validation(faqs)
+
+        except Exception as e:
+            logger.error(f"Error validating FAQs: {e}")
+            return self._generate_fallback_panel_validation(faqs)
+
+    def _generate_fallback_panel_validation(self, faqs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate fallback panel feedback, giving every expert the basic fallback review.
+
+        Args:
+            faqs: List of FAQs to validate
+
+        Returns:
+            Dictionary mapping each FAQ key to its legal, risk and customer feedback
+        """
+        logger.info("Generating fallback panel validation feedback")
+
+        return {
+            faq_key: {persona: _fallback_feedback() for persona in _EXPERT_PERSONAS}
+            for faq_key in _faq_keys(len(faqs))
+        }
+
+    def _empty_workflow_result(self) -> Dict[str, Any]:
+        """Workflow result for an empty FAQ list, produced without calling the LLM"""
+        return {
+            "validation_feedback": {},
+            "summary": self.get_validation_summary({}),
+            "recommendations": ["No FAQs to validate."]
+        }
+
+    def _build_workflow_result(self, faqs: List[Dict[str, Any]], panel_feedback: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Combine the panel feedback into the workflow result.
+
+        Args:
+            faqs: FAQs that were validated
+            panel_feedback: Normalized legal, risk and customer feedback keyed by FAQ
+
+        Returns:
+            Complete validation results including summary
+        """
         # Combine all validation feedback
         combined_feedback = {}
-        for i in range(len(faqs)):
-            faq_key = f"faq_{i}"
+        for faq_key in _faq_keys(len(faqs)):
+            expert_feedback = panel_feedback.get(faq_key) or _normalize_panel_review(None)
+            legal = expert_feedback["legal"]
+            risk = expert_feedback["risk"]
+            customer = expert_feedback["customer"]
             combined_feedback[faq_key] = {
-                "legal_validation": legal_feedback.get(faq_key, {}),
-                "risk_validation": risk_feedback.get(faq_key, {}),
-                "customer_validation": customer_feedback.get(faq_key, {}),
-                "overall_approved": all([
-                    legal_feedback.get(faq_key, {}).get("approved", False),
-                    risk_feedback.get(faq_key, {}).get("approved", False),
-                    customer_feedback.get(faq_key, {}).get("approved", False)
-                ])
+                "legal_validation": legal,
+                "risk_validation": risk,
+                "customer_validation": customer,
+                "overall_approved": bool(legal["approved"] and risk["approved"] and customer["approved"])
             }
 
         # Generate summary
@@ -243,16 +716,11 @@ Return only the JSON validation feedback, no additional text.
         Returns:
             List of recommendations
         """
-        recommendations = []
-
-        if summary["approval_rate"] < 80:
-            recommendations.append("Majority of FAQs need revision. Consider regenerating with more specific regulatory details.")
-
-        if summary["high_risk_issues"] > 0:
-            recommendations.append(f"Found {summary['high_risk_issues']} high-risk issues. Immediate legal review required.")
-
-        if summary["average_accuracy_score"] < 7:
-            recommendations.append("Average accuracy score is below acceptable threshold. Enhance regulatory text analysis.")
+        recommendations = [
+            message(summary) if callable(message) else message
+            for condition, message in _RECOMMENDATION_RULES
+            if condition(summary)
+        ]
 
         if not recommendations:
             recommendations.append("All validations passed. FAQs are ready for publication with standard disclaimer.")
@@ -1,17 +1,25 @@
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, UploadFile, File, Form, Query
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from contextlib import asynccontextmanager
-import json
+import hashlib
+import os
+import tempfile
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
 import io
-import PyPDF2
-import pdfplumber
+import multiprocessing
+import orjson
+from cachetools import LRUCache
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from ciso8601 import parse_datetime as _parse_iso_datetime  # C parser, much faster than fromisoformat
+except ImportError:
+    _parse_iso_datetime = None
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -22,17 +30,35 @@ from reportlab.lib.colors import HexColor
 # Import the regulatory FAQ system
 from main import RegulatoryFAQSystem
 from config.azure_config import AZURE_OPENAI_CONFIG
+from utils.session_store import InMemorySessionStore
+from utils.pdf_extraction import extract_text
+from utils.azure_clients import close_http_clients
 
 # Global variables for the system
 system = None
-chat_sessions = {}
-feedback_data = []  # Store all feedback for analytics
+session_store = InMemorySessionStore(max_messages=200)  # Chat sessions and feedback for analytics
+pdf_cache = LRUCache(maxsize=64)  # session_id -> (updated_at, rendered PDF bytes)
+pdf_text_cache = LRUCache(maxsize=32)  # sha256 of uploaded PDF -> extracted text
+MAX_CHAT_BATCH_SIZE = 50
+MAX_REGULATION_BATCH_SIZE = 10
+
+# Answer cache is persisted here across restarts
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.json")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for FastAPI"""
     global system
     # Startup
+    # PDF text extraction is CPU-bound, so it runs outside the event loop's process.
+    # Workers must not be forked from this process once its client and worker
+    # threads are running, so they start from a clean forkserver (spawn on Windows)
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    app.state.pdf_executor = ProcessPoolExecutor(
+        max_workers=min(4, os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context(start_method)
+    )
+
     try:
         system = RegulatoryFAQSystem()
         print("✅ Regulatory FAQ System initialized successfully")
@@ -40,17 +66,46 @@ async def lifespan(app: FastAPI):
         print(f"❌ Failed to initialize system: {e}")
         system = None
 
+    if system is not None and os.path.exists(RESPONSE_CACHE_PATH):
+        try:
+            # Answers are only valid for the knowledge base they were grounded
+            # in, which is not persisted; a cache saved with a different one is ignored
+            loaded = system.query_agent_instance.response_cache.load(
+                RESPONSE_CACHE_PATH, fingerprint=system.knowledge_base.content_digest()
+            )
+            print(f"✅ Loaded {loaded} cached answers")
+        except Exception as e:
+            print(f"⚠️ Failed to load answer cache: {e}")
+
+    if system is not None:
+        await system.query_agent_instance.embedding_batcher.start()
+
     yield
 
     # Shutdown
     print("🔄 Shutting down Regulatory FAQ System...")
 
+    if system is not None:
+        await system.query_agent_instance.embedding_batcher.stop()
+
+        try:
+            os.makedirs(os.path.dirname(RESPONSE_CACHE_PATH) or ".", exist_ok=True)
+            system.query_agent_instance.response_cache.save(
+                RESPONSE_CACHE_PATH, fingerprint=system.knowledge_base.content_digest()
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to save answer cache: {e}")
+
+    await close_http_clients()
+    app.state.pdf_executor.shutdown(wait=False, cancel_futures=True)
+
 # Initialize FastAPI app with lifespan
 app = FastAPI(
     title="Regulatory FAQ Assistant",
     description="AI-powered regulatory FAQ generation and customer query answering system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files
@@ -60,19 +115,35 @@ app.mount("/img", StaticFiles(directory="img"), name="img")
 # Templates
 templates = Jinja2Templates(directory="templates")
 
-# Global variables for chat sessions
-chat_sessions = {}
-
 class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
 
+class ChatResponse(BaseModel):
+    session_id: str
+    response: str
+    message_id: str
+    suggestions: List[str]
+    timestamp: str
+    metadata: Dict[str, Any]
+
+class BatchChatRequest(BaseModel):
+    messages: List[ChatMessage]
+
+class RegulatoryUpdate(BaseModel):
+    regulatory_text: str
+    context: str = ""
+
+class BatchRegulationRequest(BaseModel):
+    updates: List[RegulatoryUpdate]
+
 class ChatSession(BaseModel):
     session_id: str
     title: str
     messages: List[Dict[str, Any]]
-    created_at: datetime
-    updated_at: datetime
+    created_at: str  # ISO format, serialized once when set
+    updated_at: str
+    last_message_preview: str = ""  # Maintained by the session store
 
 class FeedbackData(BaseModel):
     message_id: str
@@ -82,37 +153,39 @@ class FeedbackData(BaseModel):
     query: Optional[str] = None  # The user's query that led to this response
 
 # PDF Processing Functions
-async def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF using pdfplumber (more accurate)"""
+def _spool_upload(file: UploadFile) -> Tuple[str, str]:
+    """Copy an upload's spooled file to a temp path, hashing it on the way
+
+    Returns:
+        Path of the temp file and the sha256 hex digest of its content
+    """
+    digest = hashlib.sha256()
+    file.file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+            digest.update(chunk)
+            tmp.write(chunk)
+    return tmp.name, digest.hexdigest()
+
+async def extract_text_from_pdf(file: UploadFile) -> str:
+    """Extract text from PDF in the process pool, reusing results for re-uploaded files"""
+    pdf_path, digest = await asyncio.to_thread(_spool_upload, file)
     try:
-        with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-
-            if not text.strip():
-                # Fallback to PyPDF2 if pdfplumber fails
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-
-            return text.strip()
-    except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
-        # Final fallback to PyPDF2
+        cached = pdf_text_cache.get(digest)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
-        except Exception as e2:
-            print(f"Error with PyPDF2 fallback: {e2}")
+            text = await loop.run_in_executor(getattr(app.state, "pdf_executor", None), extract_text, pdf_path)
+        except ValueError:
             raise HTTPException(status_code=400, detail="Unable to extract text from PDF. The PDF may be corrupted or contain only images.")
 
+        pdf_text_cache[digest] = text
+        return text
+    finally:
+        os.unlink(pdf_path)
+
 def validate_pdf_file(file: UploadFile) -> None:
     """Validate PDF file"""
     # Check file type
@@ -131,75 +204,193 @@ async def home(request: Request):
         "title": "Regulatory FAQ Assistant"
     })
 
-@app.post("/api/chat")
+async def _handle_query(message: ChatMessage, *, source: str = "text") -> ChatResponse:
+    """Answer one chat message and record the exchange in its session
+
+    Args:
+        message: Incoming message
+        source: "text" for typed chat, "voice" for voice input
+
+    Returns:
+        The assistant's reply
+    """
+    session_id = await _record_user_message(message, source)
+
+    # Get response from the regulatory system
+    response = await system.answer_customer_query(message.message, session_id)
+
+    return await _record_answer(session_id, response, source)
+
+async def _record_user_message(message: ChatMessage, source: str) -> str:
+    """Add an incoming chat message to its session, creating the session if needed
+
+    Args:
+        message: Incoming message
+        source: "text" for typed chat, "voice" for voice input
+
+    Returns:
+        The session ID
+    """
+    # Create or get session
+    session_id = message.session_id or str(uuid.uuid4())
+    received_at = datetime.now().isoformat()
+
+    await session_store.get_or_create(session_id, lambda: ChatSession(
+        session_id=session_id,
+        title=message.message[:50] + "..." if len(message.message) > 50 else message.message,
+        messages=[],
+        created_at=received_at,
+        updated_at=received_at
+    ))
+
+    # Add user message
+    user_message = {
+        "role": "user",
+        "content": message.message,
+        "timestamp": received_at
+    }
+    if source == "voice":
+        user_message["source"] = "voice"
+    await session_store.append_messages(session_id, user_message, updated_at=received_at)
+    return session_id
+
+async def _record_answer(session_id: str, response: Dict[str, Any], source: str) -> ChatResponse:
+    """Add the system's answer to a session as the assistant's reply
+
+    Args:
+        session_id: Session the question was asked in
+        response: Query response from the regulatory system
+        source: "text" for typed chat, "voice" for voice input
+
+    Returns:
+        The assistant's reply
+    """
+    # Get the cleaned answer (already processed by the system)
+    cleaned_answer = response.get("answer", "I apologize, but I'm experiencing technical difficulties.")
+
+    # Generate unique message ID
+    answered_at = datetime.now()
+    message_id = f"msg_{int(answered_at.timestamp() * 1000)}_{uuid.uuid4().hex[:8]}"
+
+    # Add assistant message
+    assistant_message = {
+        "role": "assistant",
+        "content": cleaned_answer,
+        "suggestions": response.get("suggestions", []),
+        "timestamp": response.get("timestamp") or answered_at.isoformat(),
+        "message_id": message_id,
+        "metadata": {
+            "used_realtime_search": response.get("used_realtime_search", False),
+            "context_sources": response.get("context_sources", 0),
+            "cache_hit": response.get("cached", False)
+        }
+    }
+    if source == "voice":
+        assistant_message["metadata"]["source"] = "voice_query"
+    await session_store.append_messages(session_id, assistant_message, updated_at=answered_at.isoformat())
+
+    return ChatResponse(
+        session_id=session_id,
+        response=assistant_message["content"],
+        message_id=message_id,
+        suggestions=assistant_message["suggestions"],
+        timestamp=assistant_message["timestamp"],
+        metadata=assistant_message["metadata"]
+    )
+
+@app.post("/api/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage, background_tasks: BackgroundTasks):
     """Handle chat messages"""
-    global system, chat_sessions
+    global system
 
     if system is None:
         raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
 
     try:
-        # Create or get session
-        session_id = message.session_id or str(uuid.uuid4())
-
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = ChatSession(
-                session_id=session_id,
-                title=message.message[:50] + "..." if len(message.message) > 50 else message.message,
-                messages=[],
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
+        return await _handle_query(message, source="text")
+
+    except Exception as e:
+        print(f"Error processing chat: {e}")
+        raise HTTPException(status_code=500, detail="Failed to process message")
 
-        session = chat_sessions[session_id]
+@app.post("/api/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Handle a chat message, streaming the answer as server-sent events
 
-        # Add user message
-        user_message = {
-            "role": "user",
-            "content": message.message,
-            "timestamp": datetime.now().isoformat()
-        }
-        session.messages.append(user_message)
-
-        # Get response from the regulatory system
-        response = await system.answer_customer_query(message.message, session_id)
-
-        # Get the cleaned answer (already processed by the system)
-        cleaned_answer = response.get("answer", "I apologize, but I'm experiencing technical difficulties.")
-
-        # Generate unique message ID
-        message_id = f"msg_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-
-        # Add assistant message
-        assistant_message = {
-            "role": "assistant",
-            "content": cleaned_answer,
-            "suggestions": response.get("suggestions", []),
-            "timestamp": response.get("timestamp", datetime.now().isoformat()),
-            "message_id": message_id,
-            "metadata": {
-                "used_realtime_search": response.get("used_realtime_search", False),
-                "context_sources": response.get("context_sources", 0)
-            }
-        }
-        session.messages.append(assistant_message)
+    Emits "token" events with model text as it arrives, then a single "done"
+    event carrying the same reply /api/chat returns.
+    """
+    global system
 
-        # Update session
-        session.updated_at = datetime.now()
+    if system is None:
+        raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
 
-        return {
-            "session_id": session_id,
-            "response": assistant_message["content"],
-            "message_id": message_id,
-            "suggestions": assistant_message["suggestions"],
-            "timestamp": assistant_message["timestamp"],
-            "metadata": assistant_message["metadata"]
-        }
+    session_id = await _record_user_message(message, "text")
 
-    except Exception as e:
-        print(f"Error processing chat: {e}")
-        raise HTTPException(status_code=500, detail="Failed to process message")
+    async def events():
+        try:
+            response = None
+            async for event in system.answer_customer_query_stream(message.message, session_id):
+                if event["type"] == "token":
+                    yield _sse_event("token", {"content": event["content"]})
+                else:
+                    response = event["response"]
+
+            reply = await _record_answer(session_id, response, "text")
+            yield _sse_event("done", reply.model_dump(mode="json"))
+
+        except Exception as e:
+            print(f"Error streaming chat: {e}")
+            yield _sse_event("error", {"detail": "Failed to process message"})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    """Encode one server-sent event with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@app.post("/api/chat/batch")
+async def chat_batch(batch: BatchChatRequest):
+    """Handle several independent chat messages concurrently, returning responses in request order"""
+    global system
+
+    if system is None:
+        raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
+
+    if len(batch.messages) > MAX_CHAT_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {MAX_CHAT_BATCH_SIZE} messages")
+
+    # Concurrent queries share embedding batches and the semantic cache
+    results = await asyncio.gather(*(_handle_query(m) for m in batch.messages), return_exceptions=True)
+
+    responses = []
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"Error processing chat in batch: {result}")
+            responses.append({"error": "Failed to process message"})
+        else:
+            responses.append(result.model_dump(mode="json"))
+
+    return {"responses": responses}
+
+def _regulation_response(result: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """Describe the outcome of processing one regulatory update"""
+    status = "success"
+    message = f"Successfully processed regulatory update. Generated {result['faqs_generated']} FAQs."
+    if result["status"] == "partial":
+        status = "partial"
+        message = (f"Processed regulatory update, but stored only {result['faqs_stored']} "
+                   f"of {result['faqs_approved']} approved FAQs.")
+    elif result["status"] == "error":
+        status = "error"
+        message = "Failed to process regulatory update."
+
+    return {
+        "status": status,
+        "message": message,
+        "source": source,
+        "details": result
+    }
 
 @app.post("/api/process-regulation")
 async def process_regulation(
@@ -220,8 +411,7 @@ async def process_regulation(
         # Handle PDF file if provided
         if pdf_file:
             validate_pdf_file(pdf_file)
-            file_content = await pdf_file.read()
-            extracted_text = await extract_text_from_pdf(file_content)
+            extracted_text = await extract_text_from_pdf(pdf_file)
             final_text = extracted_text
             print(f"✅ Extracted {len(extracted_text)} characters from PDF: {pdf_file.filename}")
 
@@ -235,7 +425,7 @@ async def process_regulation(
         # Also try to get JSON data if it's a JSON request
         if not final_text:
             try:
-                json_data = await request.json()
+                json_data = orjson.loads(await request.body())
                 final_text = json_data.get("regulatory_text", "")
                 if not context:
                     context = json_data.get("context", "")
@@ -248,12 +438,7 @@ async def process_regulation(
         # Process the regulatory update
         result = await system.process_regulatory_update(final_text, context or "")
 
-        return {
-            "status": "success",
-            "message": f"Successfully processed regulatory update. Generated {result['faqs_generated']} FAQs.",
-            "source": "PDF upload" if pdf_file else "Text input",
-            "details": result
-        }
+        return _regulation_response(result, "PDF upload" if pdf_file else "Text input")
 
     except HTTPException:
         raise
@@ -261,53 +446,64 @@ async def process_regulation(
         print(f"Error processing regulation: {e}")
         raise HTTPException(status_code=500, detail="Failed to process regulatory update")
 
-@app.get("/api/sessions")
-async def get_sessions():
-    """Get all chat sessions"""
-    global chat_sessions
+@app.post("/api/process-regulations/batch")
+async def process_regulations_batch(batch: BatchRegulationRequest):
+    """Process several regulatory texts, generating their FAQs concurrently, returning results in request order"""
+    global system
+
+    if system is None:
+        raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
+
+    if len(batch.updates) > MAX_REGULATION_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {MAX_REGULATION_BATCH_SIZE} regulatory updates")
 
+    items = [(update.regulatory_text.strip(), update.context) for update in batch.updates]
+    if not all(regulatory_text for regulatory_text, _ in items):
+        raise HTTPException(status_code=400, detail="Every regulatory update must include regulatory text.")
+
+    results = await system.process_regulatory_updates(items)
+
+    return {"results": [_regulation_response(result, "Text input") for result in results]}
+
+@app.get("/api/sessions")
+async def get_sessions(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=200)):
+    """Get chat sessions, most recently updated first"""
     sessions_list = []
-    for session_id, session in chat_sessions.items():
+    for session in await session_store.list_sessions(offset, limit):
         sessions_list.append({
             "session_id": session.session_id,
             "title": session.title,
             "message_count": len(session.messages),
-            "created_at": session.created_at.isoformat(),
-            "updated_at": session.updated_at.isoformat(),
-            "last_message": session.messages[-1]["content"][:100] + "..." if session.messages else ""
+            "created_at": session.created_at,
+            "updated_at": session.updated_at,
+            "last_message": session.last_message_preview
         })
 
-    # Sort by updated_at (most recent first)
-    sessions_list.sort(key=lambda x: x["updated_at"], reverse=True)
-
-    return {"sessions": sessions_list}
+    return {"sessions": sessions_list, "total": await session_store.count_sessions()}
 
 @app.get("/api/session/{session_id}")
 async def get_session(session_id: str):
     """Get a specific chat session"""
-    global chat_sessions
-
-    if session_id not in chat_sessions:
+    session = await session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = chat_sessions[session_id]
     return {
         "session_id": session.session_id,
         "title": session.title,
         "messages": session.messages,
-        "created_at": session.created_at.isoformat(),
-        "updated_at": session.updated_at.isoformat()
+        "created_at": session.created_at,
+        "updated_at": session.updated_at
     }
 
 @app.delete("/api/session/{session_id}")
 async def delete_session(session_id: str):
     """Delete a chat session"""
-    global chat_sessions
-
-    if session_id not in chat_sessions:
+    if not await session_store.delete(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
-    del chat_sessions[session_id]
+    pdf_cache.pop(session_id, None)
+
     return {"message": "Session deleted successfully"}
 
 @app.get("/api/system-status")
@@ -333,75 +529,16 @@ async def get_system_status():
             "message": str(e)
         }
 
-@app.post("/api/voice_query")
+@app.post("/api/voice_query", response_model=ChatResponse)
 async def voice_query(message: ChatMessage, background_tasks: BackgroundTasks):
     """Handle voice input queries - same as regular chat but for voice"""
-    global system, chat_sessions
+    global system
 
     if system is None:
-        await initialize_system()
-        if system is None:
-            raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
+        raise HTTPException(status_code=500, detail="System is still initializing. Please try again in a moment.")
 
     try:
-        # Create or get session
-        session_id = message.session_id or str(uuid.uuid4())
-
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = ChatSession(
-                session_id=session_id,
-                title=message.message[:50] + "..." if len(message.message) > 50 else message.message,
-                messages=[],
-                created_at=datetime.now(),
-                updated_at=datetime.now()
-            )
-
-        session = chat_sessions[session_id]
-
-        # Add user message
-        user_message = {
-            "role": "user",
-            "content": message.message,
-            "timestamp": datetime.now().isoformat(),
-            "source": "voice"
-        }
-        session.messages.append(user_message)
-
-        # Get response from the regulatory system
-        response = await system.answer_customer_query(message.message, session_id)
-
-        # Get the cleaned answer (already processed by the system)
-        cleaned_answer = response.get("answer", "I apologize, but I'm experiencing technical difficulties.")
-
-        # Generate unique message ID
-        message_id = f"msg_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-
-        # Add assistant message
-        assistant_message = {
-            "role": "assistant",
-            "content": cleaned_answer,
-            "suggestions": response.get("suggestions", []),
-            "timestamp": response.get("timestamp", datetime.now().isoformat()),
-            "message_id": message_id,
-            "metadata": {
-                "used_realtime_search": response.get("used_realtime_search", False),
-                "context_sources": response.get("context_sources", 0),
-                "source": "voice_query"
-            }
-        }
-        session.messages.append(assistant_message)
-
-        # Update session
-        session.updated_at = datetime.now()
-
-        return {
-            "session_id": session_id,
-            "response": assistant_message["content"],
-            "message_id": message_id,
-            "suggestions": assistant_message["suggestions"],
-            "timestamp": assistant_message["timestamp"],
-            "metadata": assistant_message["metadata"]
-        }
+        return await _handle_query(message, source="voice")
 
     except Exception as e:
         print(f"Error processing voice query: {e}")
@@ -410,13 +547,11 @@ async def voice_query(message: ChatMessage, background_tasks: BackgroundTasks):
 @app.post("/api/feedback")
 async def submit_feedback(feedback: FeedbackData):
     """Submit user feedback for a message"""
-    global feedback_data, chat_sessions
-
     try:
         # Find the corresponding user query from the session
         query = None
-        if feedback.session_id in chat_sessions:
-            session = chat_sessions[feedback.session_id]
+        session = await session_store.get(feedback.session_id)
+        if session is not None:
             # Find the user message that preceded this assistant message
             for i, msg in enumerate(session.messages):
                 if msg.get("message_id") == feedback.message_id:
@@ -436,9 +571,9 @@ async def submit_feedback(feedback: FeedbackData):
             "query": query
         }
 
-        feedback_data.append(feedback_entry)
+        feedback_id = await session_store.add_feedback(feedback_entry)
 
-        return {"message": "Feedback submitted successfully", "feedback_id": len(feedback_data) - 1}
+        return {"message": "Feedback submitted successfully", "feedback_id": feedback_id}
 
     except Exception as e:
         print(f"Error submitting feedback: {e}")
@@ -447,44 +582,26 @@ async def submit_feedback(feedback: FeedbackData):
 @app.get("/api/analytics")
 async def get_analytics():
     """Get analytics data for feedback"""
-    global feedback_data
-
     try:
-        # Calculate basic stats
-        positive_count = sum(1 for f in feedback_data if f["feedback_type"] == "positive")
-        negative_count = sum(1 for f in feedback_data if f["feedback_type"] == "negative")
-        total_feedback = len(feedback_data)
+        # Last 7 days, oldest first
+        now = datetime.now()
+        dates = [(now - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(6, -1, -1)]
 
-        # Get recent feedback (last 10)
-        recent_feedback = sorted(feedback_data, key=lambda x: x["timestamp"], reverse=True)[:10]
+        # Counters are maintained by the store as feedback arrives
+        stats = await session_store.get_feedback_stats(dates)
 
         # Prepare chart data (last 7 days)
         chart_data = {
-            "labels": [],
-            "positive": [],
-            "negative": []
+            "labels": dates,
+            "positive": [stats["daily"][date].get("positive", 0) for date in dates],
+            "negative": [stats["daily"][date].get("negative", 0) for date in dates]
         }
 
-        # Generate last 7 days
-        from datetime import datetime, timedelta
-        for i in range(6, -1, -1):
-            date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-            chart_data["labels"].append(date)
-
-            # Count positive and negative for this date
-            positive = sum(1 for f in feedback_data
-                          if f["timestamp"].startswith(date) and f["feedback_type"] == "positive")
-            negative = sum(1 for f in feedback_data
-                          if f["timestamp"].startswith(date) and f["feedback_type"] == "negative")
-
-            chart_data["positive"].append(positive)
-            chart_data["negative"].append(negative)
-
         return {
-            "positive_count": positive_count,
-            "negative_count": negative_count,
-            "total_feedback": total_feedback,
-            "recent_feedback": recent_feedback,
+            "positive_count": stats["totals"].get("positive", 0),
+            "negative_count": stats["totals"].get("negative", 0),
+            "total_feedback": stats["total"],
+            "recent_feedback": stats["recent"],
             "chart_data": chart_data
         }
 
@@ -495,140 +612,157 @@ async def get_analytics():
 @app.get("/api/analytics/export")
 async def export_analytics():
     """Export analytics data as CSV"""
-    global feedback_data
-
     try:
         return {
-            "feedback": feedback_data,
+            "feedback": await session_store.list_feedback(),
             "export_timestamp": datetime.now().isoformat()
         }
     except Exception as e:
         print(f"Error exporting analytics: {e}")
         raise HTTPException(status_code=500, detail="Failed to export analytics")
 
-@app.get("/api/download-chat/{session_id}")
-async def download_chat_pdf(session_id: str):
-    """Download chat session as PDF"""
-    global chat_sessions
-
-    try:
-        if session_id not in chat_sessions:
-            raise HTTPException(status_code=404, detail="Chat session not found")
+# PDF export styles, built once and shared by every export
+_PDF_STYLES = getSampleStyleSheet()
 
-        session = chat_sessions[session_id]
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_PDF_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1,  # Center alignment
+    textColor=HexColor('#0ea5e9')
+)
 
-        # Create PDF buffer
-        buffer = io.BytesIO()
+_USER_STYLE = ParagraphStyle(
+    'UserMessage',
+    parent=_PDF_STYLES['Normal'],
+    fontSize=12,
+    spaceAfter=10,
+    leftIndent=20,
+    backgroundColor=HexColor('#f0f9ff'),
+    borderColor=HexColor('#0ea5e9'),
+    borderWidth=1,
+    borderPadding=10,
+    borderRadius=5
+)
 
-        # Create PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+_ASSISTANT_STYLE = ParagraphStyle(
+    'AssistantMessage',
+    parent=_PDF_STYLES['Normal'],
+    fontSize=12,
+    spaceAfter=10,
+    leftIndent=20,
+    backgroundColor=HexColor('#fef3c7'),
+    borderColor=HexColor('#f59e0b'),
+    borderWidth=1,
+    borderPadding=10,
+    borderRadius=5
+)
 
-        # Create custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=HexColor('#0ea5e9')
-        )
+_TIMESTAMP_STYLE = ParagraphStyle(
+    'Timestamp',
+    parent=_PDF_STYLES['Normal'],
+    fontSize=10,
+    textColor=HexColor('#6b7280'),
+    spaceAfter=15,
+    alignment=2  # Right alignment
+)
 
-        user_style = ParagraphStyle(
-            'UserMessage',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=10,
-            leftIndent=20,
-            backgroundColor=HexColor('#f0f9ff'),
-            borderColor=HexColor('#0ea5e9'),
-            borderWidth=1,
-            borderPadding=10,
-            borderRadius=5
-        )
+def _parse_timestamp(timestamp: str) -> datetime:
+    """Parse an ISO-format timestamp, using ciso8601 when available"""
+    if _parse_iso_datetime is not None:
+        return _parse_iso_datetime(timestamp)
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+def _build_chat_pdf(session_id: str, title: str, created_at: str, messages: List[Dict[str, Any]]) -> bytes:
+    """Render a chat session transcript as a PDF document"""
+    # Create PDF buffer
+    buffer = io.BytesIO()
+
+    # Create PDF document
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+
+    # Build PDF content
+    content = []
+
+    # Title
+    title = title or f"Chat Session - {session_id[:8]}"
+    content.append(Paragraph(title, _TITLE_STYLE))
+    content.append(Spacer(1, 20))
+
+    # Session info
+    session_info = f"Created: {_parse_timestamp(created_at).strftime('%Y-%m-%d %H:%M:%S')} | Messages: {len(messages)}"
+    content.append(Paragraph(session_info, _TIMESTAMP_STYLE))
+    content.append(Spacer(1, 30))
+
+    # Messages
+    for i, msg in enumerate(messages):
+        if msg.get('role') == 'user':
+            # User message
+            timestamp = msg.get('timestamp', '')
+            if timestamp:
+                try:
+                    dt = _parse_timestamp(timestamp)
+                    content.append(Paragraph(f"You - {dt.strftime('%H:%M:%S')}", _TIMESTAMP_STYLE))
+                except:
+                    pass
+
+            content.append(Paragraph(msg.get('content', ''), _USER_STYLE))
+
+        elif msg.get('role') == 'assistant':
+            # Assistant message
+            timestamp = msg.get('timestamp', '')
+            if timestamp:
+                try:
+                    dt = _parse_timestamp(timestamp)
+                    content.append(Paragraph(f"Assistant - {dt.strftime('%H:%M:%S')}", _TIMESTAMP_STYLE))
+                except:
+                    pass
+
+            content.append(Paragraph(msg.get('content', ''), _ASSISTANT_STYLE))
+
+            # Add suggestions if available
+            suggestions = msg.get('suggestions', [])
+            if suggestions:
+                content.append(Paragraph("Related Questions:", _PDF_STYLES['Heading4']))
+                for j, suggestion in enumerate(suggestions, 1):
+                    content.append(Paragraph(f"{j}. {suggestion}", _PDF_STYLES['Bullet']))
+                content.append(Spacer(1, 10))
+
+    # Build and save PDF
+    doc.build(content)
+
+    return buffer.getvalue()
 
-        assistant_style = ParagraphStyle(
-            'AssistantMessage',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=10,
-            leftIndent=20,
-            backgroundColor=HexColor('#fef3c7'),
-            borderColor=HexColor('#f59e0b'),
-            borderWidth=1,
-            borderPadding=10,
-            borderRadius=5
-        )
+@app.get("/api/download-chat/{session_id}")
+async def download_chat_pdf(session_id: str):
+    """Download chat session as PDF"""
+    try:
+        session = await session_store.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
 
-        timestamp_style = ParagraphStyle(
-            'Timestamp',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=HexColor('#6b7280'),
-            spaceAfter=15,
-            alignment=2  # Right alignment
-        )
+        # Reuse the last rendering unless the session changed since
+        cached = pdf_cache.get(session_id)
+        if cached is not None and cached[0] == session.updated_at:
+            pdf_bytes = cached[1]
+        else:
+            updated_at = session.updated_at
+            pdf_bytes = await asyncio.to_thread(
+                _build_chat_pdf, session_id, session.title, session.created_at, list(session.messages)
+            )
+            pdf_cache[session_id] = (updated_at, pdf_bytes)
 
-        # Build PDF content
-        content = []
-
-        # Title
-        title = session.title or f"Chat Session - {session_id[:8]}"
-        content.append(Paragraph(title, title_style))
-        content.append(Spacer(1, 20))
-
-        # Session info
-        session_info = f"Created: {session.created_at.strftime('%Y-%m-%d %H:%M:%S')} | Messages: {len(session.messages)}"
-        content.append(Paragraph(session_info, timestamp_style))
-        content.append(Spacer(1, 30))
-
-        # Messages
-        for i, msg in enumerate(session.messages):
-            if msg.get('role') == 'user':
-                # User message
-                timestamp = msg.get('timestamp', '')
-                if timestamp:
-                    try:
-                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        content.append(Paragraph(f"You - {dt.strftime('%H:%M:%S')}", timestamp_style))
-                    except:
-                        pass
-
-                content.append(Paragraph(msg.get('content', ''), user_style))
-
-            elif msg.get('role') == 'assistant':
-                # Assistant message
-                timestamp = msg.get('timestamp', '')
-                if timestamp:
-                    try:
-                        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                        content.append(Paragraph(f"Assistant - {dt.strftime('%H:%M:%S')}", timestamp_style))
-                    except:
-                        pass
-
-                content.append(Paragraph(msg.get('content', ''), assistant_style))
-
-                # Add suggestions if available
-                suggestions = msg.get('suggestions', [])
-                if suggestions:
-                    content.append(Paragraph("Related Questions:", styles['Heading4']))
-                    for j, suggestion in enumerate(suggestions, 1):
-                        content.append(Paragraph(f"{j}. {suggestion}", styles['Bullet']))
-                    content.append(Spacer(1, 10))
-
-        # Build and save PDF
-        doc.build(content)
-
-        # Return PDF as streaming response
-        buffer.seek(0)
-        return StreamingResponse(
-            buffer,
+        return Response(
+            content=pdf_bytes,
             media_type='application/pdf',
             headers={
                 'Content-Disposition': f'attachment; filename="chat_session_{session_id}.pdf"'
             }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating PDF for session {session_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate PDF")
@@ -640,4 +774,5 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
+    # Single process: sessions, feedback and caches live in this process's memory
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,10 +1,12 @@
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+import os
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 from autogen import ConversableAgent, UserProxyAgent
 from agents.faq_agent import FAQAgent
 from agents.validation_agent import ValidationAgent
 from agents.query_agent import QueryAgent
+from utils.azure_clients import AZURE_SEM
 from utils.memory_storage import RegulatoryKnowledgeBase
 from config.azure_config import AZURE_OPENAI_CONFIG
 
@@ -21,12 +23,17 @@ class RegulatoryFAQSystem:
     """
 
     def __init__(self):
-        # Initialize knowledge base
-        self.knowledge_base = RegulatoryKnowledgeBase()
+        # Initialize knowledge base; int8 embeddings cut search memory 4x for large corpora
+        self.knowledge_base = RegulatoryKnowledgeBase(
+            quantize_embeddings=os.getenv("QUANTIZE_EMBEDDINGS", "false").lower() == "true"
+        )
 
         # Initialize agents
         self.faq_agent_instance = FAQAgent()
-        self.validation_agent_instance = ValidationAgent()
+        # LLMLingua-2 compression of the regulatory text in review prompts (needs the llmlingua package)
+        self.validation_agent_instance = ValidationAgent(
+            compress_regulatory_text=os.getenv("COMPRESS_REGULATORY_TEXT", "false").lower() == "true"
+        )
         self.query_agent_instance = QueryAgent(self.knowledge_base)
 
         # Initialize AutoGen agents
@@ -46,15 +53,16 @@ class RegulatoryFAQSystem:
             "api_version": AZURE_OPENAI_CONFIG["api_version"]
         }
 
+        # One config object shared by all agents, without AutoGen's on-disk response cache
+        llm_config = {"config_list": [azure_config], "cache_seed": None}
+
         # FAQ Generation Agent
         self.faq_agent = ConversableAgent(
             name="FAQ_Agent",
             system_message="""You are a specialized agent for generating FAQs from regulatory texts.
             Your role is to analyze regulatory changes and create 3-5 clear, accurate FAQs in JSON format.
             Always respond with properly formatted JSON containing the FAQs.""",
-            llm_config={
-                "config_list": [azure_config]
-            },
+            llm_config=llm_config,
             human_input_mode="NEVER",
         )
 
@@ -64,9 +72,7 @@ class RegulatoryFAQSystem:
             system_message="""You are an expert validation agent specializing in regulatory compliance.
             Your role is to review FAQs for accuracy, legal compliance, and completeness.
             Simulate expert feedback from risk and legal teams.""",
-            llm_config={
-                "config_list": [azure_config]
-            },
+            llm_config=llm_config,
             human_input_mode="NEVER",
         )
 
@@ -76,9 +82,7 @@ class RegulatoryFAQSystem:
             system_message="""You are a customer service agent specializing in regulatory queries.
             Answer customer questions about regulations using available knowledge and real-time search.
             Maintain conversational context and provide helpful, accurate responses.""",
-            llm_config={
-                "config_list": [azure_config]
-            },
+            llm_config=llm_config,
             human_input_mode="NEVER",
         )
 
@@ -114,46 +118,124 @@ class RegulatoryFAQSystem:
         try:
             # Step 1: Generate FAQs
             logger.info("Step 1: Generating FAQs...")
-            faqs = self.faq_agent_instance.generate_faqs(regulatory_text, context)
+            faqs = await self.faq_agent_instance.agenerate_faqs(regulatory_text, context)
 
-            # Step 2: Validate FAQs
-            logger.info("Step 2: Validating FAQs...")
-            validation_results = self.validation_agent_instance.simulate_expert_workflow(
-                faqs, regulatory_text
-            )
+            return await self._validate_and_store_faqs(faqs, regulatory_text)
 
-            # Step 3: Store validated FAQs in knowledge base
-            logger.info("Step 3: Storing FAQs in knowledge base...")
-            approved_faqs = [
-                faq for faq in faqs
-                if validation_results["validation_feedback"].get(f"faq_{faqs.index(faq)}", {}).get("overall_approved", False)
-            ]
-
-            self.knowledge_base.add_faqs(approved_faqs, regulatory_text)
-
-            # Step 4: Store regulatory text
-            self.knowledge_base.add_regulatory_text(regulatory_text, "Regulatory Update")
-
-            result = {
-                "status": "success",
-                "faqs_generated": len(faqs),
-                "faqs_approved": len(approved_faqs),
-                "validation_summary": validation_results["summary"],
-                "recommendations": validation_results.get("recommendations", []),
-                "approved_faqs": approved_faqs
-            }
+        except Exception as e:
+            logger.error(f"Error processing regulatory update: {e}")
+            return self._failed_update_result(e)
+
+    async def process_regulatory_updates(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Process several regulatory updates, generating FAQs for all of them
+        concurrently before each update's FAQs are validated and stored.
+
+        Args:
+            items: (regulatory_text, context) pairs to process
 
-            logger.info(f"Regulatory update processing completed: {result}")
-            return result
+        Returns:
+            One result per update, in input order, as from process_regulatory_update
+        """
+        logger.info(f"Starting batch processing of {len(items)} regulatory updates...")
 
+        try:
+            logger.info("Step 1: Generating FAQs for all updates...")
+            faq_lists = await self.faq_agent_instance.agenerate_faqs_batch(items)
         except Exception as e:
-            logger.error(f"Error processing regulatory update: {e}")
-            return {
-                "status": "error",
-                "error_message": str(e),
-                "faqs_generated": 0,
-                "faqs_approved": 0
-            }
+            logger.error(f"Error generating FAQs for regulatory updates: {e}")
+            return [self._failed_update_result(e) for _ in items]
+
+        async def validate_and_store(faqs: List[Dict[str, Any]], regulatory_text: str) -> Dict[str, Any]:
+            try:
+                return await self._validate_and_store_faqs(faqs, regulatory_text)
+            except Exception as e:
+                logger.error(f"Error processing regulatory update: {e}")
+                return self._failed_update_result(e)
+
+        return list(await asyncio.gather(*(
+            validate_and_store(faqs, regulatory_text)
+            for faqs, (regulatory_text, _) in zip(faq_lists, items)
+        )))
+
+    async def _validate_and_store_faqs(self, faqs: List[Dict[str, Any]], regulatory_text: str) -> Dict[str, Any]:
+        """
+        Validate generated FAQs and store the approved ones with their regulatory text.
+
+        Args:
+            faqs: FAQs generated for the regulatory text
+            regulatory_text: The regulatory text they were generated from
+
+        Returns:
+            Dictionary containing the processing results
+        """
+        # Step 2: Validate FAQs
+        logger.info("Step 2: Validating FAQs...")
+        validation_results = await self.validation_agent_instance.asimulate_expert_workflow(
+            faqs, regulatory_text
+        )
+
+        # Step 3: Store validated FAQs in knowledge base
+        logger.info("Step 3: Storing FAQs in knowledge base...")
+        validation_feedback = validation_results["validation_feedback"]
+        approved_faqs = [
+            faq for i, faq in enumerate(faqs)
+            if validation_feedback.get(f"faq_{i}", {}).get("overall_approved", False)
+        ]
+
+        faqs_added = 0
+        storage_error = None
+        try:
+            faqs_added = await self.knowledge_base.aadd_faqs(
+                approved_faqs,
+                regulatory_text,
+                aembed_documents_func=self._aembed_faq_documents
+            )
+            if faqs_added < len(approved_faqs):
+                logger.info(f"Skipped {len(approved_faqs) - faqs_added} FAQs already in the knowledge base")
+        except Exception as e:
+            logger.error(f"Error embedding FAQs, not storing them: {e}")
+            storage_error = str(e)
+
+        # Step 4: Store regulatory text
+        text_added = self.knowledge_base.add_regulatory_text(regulatory_text, "Regulatory Update")
+        if not text_added:
+            logger.info("Regulatory text is already in the knowledge base")
+
+        # Cached answers may predate this update
+        if faqs_added or text_added:
+            self.query_agent_instance.clear_response_cache()
+
+        result = {
+            "status": "partial" if storage_error else "success",
+            "faqs_generated": len(faqs),
+            "faqs_approved": len(approved_faqs),
+            "faqs_stored": faqs_added,
+            "validation_summary": validation_results["summary"],
+            "recommendations": validation_results.get("recommendations", []),
+            "approved_faqs": approved_faqs
+        }
+        if storage_error:
+            result["error_message"] = f"Approved FAQs could not be stored: {storage_error}"
+
+        logger.info(f"Regulatory update processing completed: {result}")
+        return result
+
+    @staticmethod
+    def _failed_update_result(error: Exception) -> Dict[str, Any]:
+        """Result reported for a regulatory update whose processing failed"""
+        return {
+            "status": "error",
+            "error_message": str(error),
+            "faqs_generated": 0,
+            "faqs_approved": 0,
+            "faqs_stored": 0
+        }
+
+    async def _aembed_faq_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed FAQ texts without blocking the event loop, as background Azure work"""
+        async with AZURE_SEM.slot(background=True):
+            return await self.query_agent_instance.embeddings.aembed_documents(texts)
 
     async def answer_customer_query(self, query: str, user_id: str = "default") -> Dict[str, Any]:
         """
@@ -169,7 +251,7 @@ class RegulatoryFAQSystem:
         logger.info(f"Answering query for user {user_id}: {query[:50]}...")
 
         try:
-            response = self.query_agent_instance.answer_query(query, user_id)
+            response = await self.query_agent_instance.aanswer_query(query, user_id)
             return response
         except Exception as e:
             logger.error(f"Error answering customer query: {e}")
@@ -180,6 +262,22 @@ class RegulatoryFAQSystem:
                 "timestamp": None
             }
 
+    async def answer_customer_query_stream(self, query: str, user_id: str = "default") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a customer query, streaming the answer as the Query Agent produces it.
+
+        Args:
+            query: Customer's question
+            user_id: Unique user identifier
+
+        Yields:
+            Token events followed by a final done event carrying the query response
+        """
+        logger.info(f"Streaming answer for user {user_id}: {query[:50]}...")
+
+        async for event in self.query_agent_instance.answer_query_stream(query, user_id):
+            yield event
+
     def get_system_status(self) -> Dict[str, Any]:
         """Get the current system status."""
         return {
@@ -192,6 +290,7 @@ class RegulatoryFAQSystem:
     def clear_knowledge_base(self):
         """Clear all stored knowledge (for testing/reset purposes)."""
         self.knowledge_base.clear_all()
+        self.query_agent_instance.clear_response_cache()
         logger.info("Knowledge base cleared")
 
 
@@ -226,6 +325,7 @@ async def main():
     print(f"   Status: {result['status']}")
     print(f"   FAQs Generated: {result['faqs_generated']}")
     print(f"   FAQs Approved: {result['faqs_approved']}")
+    print(f"   FAQs Stored: {result['faqs_stored']}")
     print(f"   Validation Summary: {result['validation_summary']}")
 
     if result['recommendations']:
@@ -15,6 +15,14 @@ def main():
     current_dir = Path(__file__).parent
     sys.path.insert(0, str(current_dir))
 
+    # ENV=dev (the default) reloads on code changes and logs every request;
+    # anything else runs without the file watcher or access log
+    dev_mode = os.getenv("ENV", "dev") == "dev"
+
+    # Sessions, feedback and caches live in process memory, so extra workers
+    # would each see only their own share; opt in explicitly with WORKERS
+    workers = 1 if dev_mode else int(os.getenv("WORKERS", "1"))
+
     print("🚀 Starting Regulatory FAQ Assistant Server...")
     print("=" * 50)
     print("📍 Server will be available at:")
@@ -29,10 +37,11 @@ def main():
             "app:app",
             host="0.0.0.0",
             port=8000,
-            reload=True,
-            reload_dirs=[str(current_dir)],
+            reload=dev_mode,
+            reload_dirs=[str(current_dir)] if dev_mode else None,
+            workers=workers,
             log_level="info",
-            access_log=True
+            access_log=dev_mode
         )
     except KeyboardInterrupt:
         print("\n👋 Server stopped by user")
@@ -0,0 +1,58 @@
+import asyncio
+import inspect
+from typing import Any, Dict, List
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run async test functions to completion on a fresh event loop"""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    funcargs = pyfuncitem.funcargs
+    asyncio.run(pyfuncitem.obj(**{name: funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}))
+    return True
+
+
+def fake_embedding(text: str) -> List[float]:
+    """Deterministic stand-in for an embedding vector"""
+    return [float(len(text)), 1.0]
+
+
+class RecordingEmbedder:
+    """Async stand-in for an embed_documents call that records the texts of every call"""
+
+    vector = staticmethod(fake_embedding)
+
+    def __init__(self):
+        self.calls = []
+        self.delay = 0.0
+        self.error = None
+
+    async def __call__(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [fake_embedding(text) for text in texts]
+
+
+@pytest.fixture
+def embed_documents():
+    """Sync stand-in for the embeddings API"""
+    return lambda texts: [fake_embedding(text) for text in texts]
+
+
+@pytest.fixture
+def aembed_documents() -> RecordingEmbedder:
+    return RecordingEmbedder()
+
+
+@pytest.fixture
+def make_faq():
+    """Build FAQ dictionaries as produced by the FAQ agent"""
+    def make(question: str, answer: str, **fields: Any) -> Dict[str, Any]:
+        return {"question": question, "answer": answer, **fields}
+    return make
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from utils.concurrency import DynamicSemaphore
+
+
+class Overloaded(Exception):
+    pass
+
+
+def _semaphore(**kwargs) -> DynamicSemaphore:
+    return DynamicSemaphore(is_overload=lambda e: isinstance(e, Overloaded), **kwargs)
+
+
+async def _fail(semaphore: DynamicSemaphore, error: Exception):
+    with pytest.raises(type(error)):
+        async with semaphore.slot():
+            raise error
+
+
+async def test_limit_caps_requests_in_flight():
+    semaphore = _semaphore(initial_limit=2)
+    in_flight = peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with semaphore.slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    assert peak == 2
+
+
+async def test_overload_halves_limit_and_success_restores_it():
+    semaphore = _semaphore(initial_limit=4, window=2, increase_step=1)
+    for _ in range(2):
+        await _fail(semaphore, Overloaded())
+    assert semaphore.current_limit == 2
+
+    for _ in range(4):
+        async with semaphore.slot():
+            pass
+    assert semaphore.current_limit == 4
+
+
+async def test_slow_requests_do_not_shrink_limit():
+    semaphore = _semaphore(initial_limit=4, window=2, max_limit=4)
+    for _ in range(2):
+        async with semaphore.slot():
+            await asyncio.sleep(0.02)
+    assert semaphore.current_limit == 4
+
+
+async def test_other_errors_do_not_shrink_limit():
+    semaphore = _semaphore(initial_limit=4, window=2, max_limit=4)
+    for _ in range(2):
+        await _fail(semaphore, ValueError())
+    assert semaphore.current_limit == 4
+
+
+async def test_limit_stays_within_bounds():
+    semaphore = _semaphore(initial_limit=2, min_limit=1, window=1)
+    for _ in range(5):
+        await _fail(semaphore, Overloaded())
+    assert semaphore.current_limit == 1
+
+
+async def test_interactive_waiters_go_before_background_ones():
+    semaphore = _semaphore(initial_limit=1)
+    order = []
+
+    async def request(name: str, background: bool):
+        async with semaphore.slot(background=background):
+            order.append(name)
+
+    await semaphore.acquire()
+    waiters = [
+        asyncio.create_task(request("background", True)),
+        asyncio.create_task(request("interactive", False)),
+    ]
+    await asyncio.sleep(0)
+    semaphore.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["interactive", "background"]
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    semaphore = _semaphore(initial_limit=1)
+    await semaphore.acquire()
+    waiter = asyncio.create_task(semaphore.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    semaphore.release()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(semaphore.acquire(), 1)
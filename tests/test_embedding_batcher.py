@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from utils.embedding_batcher import EmbeddingBatcher
+
+
+async def _started(batcher: EmbeddingBatcher) -> EmbeddingBatcher:
+    await batcher.start()
+    return batcher
+
+
+async def test_embeds_directly_when_not_started(aembed_documents):
+    assert await EmbeddingBatcher(aembed_documents).embed("abc") == aembed_documents.vector("abc")
+    assert aembed_documents.calls == [["abc"]]
+
+
+async def test_concurrent_requests_share_one_call(aembed_documents):
+    batcher = await _started(EmbeddingBatcher(aembed_documents, max_wait_ms=50))
+    try:
+        vectors = await asyncio.gather(*(batcher.embed(text) for text in ("a", "bb", "a")))
+    finally:
+        await batcher.stop()
+
+    assert vectors == [aembed_documents.vector("a"), aembed_documents.vector("bb"), aembed_documents.vector("a")]
+    assert aembed_documents.calls == [["a", "bb"]]
+
+
+async def test_batches_are_capped_at_max_batch_size(aembed_documents):
+    batcher = await _started(EmbeddingBatcher(aembed_documents, max_batch_size=2, max_wait_ms=50))
+    try:
+        await asyncio.gather(*(batcher.embed(text) for text in ("a", "b", "c")))
+    finally:
+        await batcher.stop()
+
+    assert aembed_documents.calls == [["a", "b"], ["c"]]
+
+
+async def test_embedding_errors_reach_every_caller(aembed_documents):
+    aembed_documents.error = RuntimeError("service unavailable")
+    batcher = await _started(EmbeddingBatcher(aembed_documents, max_wait_ms=10))
+    try:
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+    assert [str(result) for result in results] == ["service unavailable"] * 2
+
+
+async def test_stop_fails_requests_in_a_partly_collected_batch(aembed_documents):
+    batcher = await _started(EmbeddingBatcher(aembed_documents, max_wait_ms=10_000))
+    request = asyncio.create_task(batcher.embed("a"))
+    while not batcher._collecting:  # Wait until the collector takes the request
+        await asyncio.sleep(0.001)
+    await batcher.stop()
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        await asyncio.wait_for(request, 1)
+
+
+async def test_stop_waits_for_in_flight_batches(aembed_documents):
+    aembed_documents.delay = 0.05
+    batcher = await _started(EmbeddingBatcher(aembed_documents, max_batch_size=1))
+    request = asyncio.create_task(batcher.embed("abc"))
+    while not aembed_documents.calls:  # Wait until the batch is being embedded
+        await asyncio.sleep(0.001)
+    await batcher.stop()
+
+    assert request.result() == aembed_documents.vector("abc")
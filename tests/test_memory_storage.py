@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+
+from utils.memory_storage import InMemoryVectorStore, RegulatoryKnowledgeBase
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_similarity_search_ranks_by_cosine_similarity(quantize):
+    store = InMemoryVectorStore(quantize=quantize)
+    store.add_documents(["x", "y"], [[1.0, 0.0], [0.0, 1.0]], [{"id": "x"}, {"id": "y"}])
+    store.add_documents(["xy"], [[1.0, 1.0]])
+
+    results = store.similarity_search([1.0, 0.1], top_k=2)
+
+    assert [document for document, _, _ in results] == ["x", "xy"]
+    assert results[0][1] == {"id": "x"}
+    assert results[0][2] == pytest.approx(0.995, abs=0.01)
+
+
+def test_similarity_search_matches_brute_force_after_growth():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(200, 16))
+    store = InMemoryVectorStore()
+    for start in range(0, 200, 30):
+        store.add_documents([str(i) for i in range(start, min(start + 30, 200))],
+                            embeddings[start:start + 30].tolist())
+
+    query = rng.normal(size=16)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+
+    assert [document for document, _, _ in store.similarity_search(query.tolist(), top_k=5)] == [str(i) for i in expected]
+
+
+def test_similarity_search_on_empty_or_cleared_store():
+    store = InMemoryVectorStore()
+    assert store.similarity_search([1.0, 0.0]) == []
+
+    store.add_documents(["x"], [[1.0, 0.0]])
+    store.clear()
+    assert store.similarity_search([1.0, 0.0]) == []
+
+
+def test_ann_index_is_built_once_the_store_is_large_enough():
+    pytest.importorskip("hnswlib")
+    rng = np.random.default_rng(0)
+    store = InMemoryVectorStore(ann_min_documents=50)
+    store.add_documents([str(i) for i in range(40)], rng.normal(size=(40, 8)).tolist())
+    assert store._ann_index is None
+
+    embeddings = rng.normal(size=(20, 8)).tolist()
+    store.add_documents([str(i) for i in range(40, 60)], embeddings)
+    assert store._ann_index is not None
+    assert store.similarity_search(embeddings[0], top_k=1)[0][0] == "40"
+
+
+def test_get_recent_faqs_returns_newest_first(make_faq):
+    kb = RegulatoryKnowledgeBase()
+    kb.add_faqs([make_faq(f"Question {i}?", f"Answer {i}") for i in range(3)])
+
+    assert [faq["question"] for faq in kb.get_recent_faqs(2)] == ["Question 2?", "Question 1?"]
+    assert kb.get_recent_faqs(0) == []
+
+
+class TestTextSearch:
+    @pytest.fixture
+    def kb(self, make_faq):
+        kb = RegulatoryKnowledgeBase()
+        kb.add_faqs([
+            make_faq("When is the KYC deadline?", "December 31, 2024."),
+            make_faq("Do transfers need biometric verification?", "Yes, for transactions over $500."),
+            make_faq("What are the penalties?", "Up to $100,000 per violation of the KYC rules."),
+        ])
+        return kb
+
+    def test_phrase_in_question_ranks_first(self, kb):
+        results = kb.search_faqs("KYC deadline")
+
+        assert results[0]["question"] == "When is the KYC deadline?"
+        assert results[0]["score"] == 1.0
+        assert results[0]["metadata"]["question"] == "When is the KYC deadline?"
+
+    def test_single_keyword_matches_by_substring(self, kb):
+        results = kb.search_faqs("What is KYC?")
+
+        assert {result["question"] for result in results} == {
+            "When is the KYC deadline?",
+            "What are the penalties?",
+        }
+
+    def test_keywords_score_partial_matches(self, kb):
+        results = kb.search_faqs("biometric verification requirements")
+
+        assert [result["question"] for result in results] == ["Do transfers need biometric verification?"]
+        assert results[0]["score"] == pytest.approx(0.5 * 2 / 3)
+
+    def test_stop_words_alone_match_nothing(self, kb):
+        assert kb.search_faqs("what about those") == []
+
+    def test_top_k_limits_results(self, kb):
+        assert len(kb.search_faqs("KYC", top_k=1)) == 1
+
+
+def test_semantic_search_uses_precomputed_embedding(make_faq):
+    kb = RegulatoryKnowledgeBase()
+    kb.add_faqs([make_faq("What is KYC?", "Know your customer")], embed_documents_func=lambda texts: [[1.0, 0.0]])
+
+    def unexpected(query):
+        raise AssertionError("embedding_func should not be called")
+
+    results = kb.search_faqs("kyc", embedding_func=unexpected, query_embedding=[1.0, 0.0])
+
+    assert [result["question"] for result in results] == ["What is KYC?"]
+    assert results[0]["score"] == pytest.approx(1.0)
+
+
+def test_add_faqs_skips_duplicates(make_faq, embed_documents):
+    kb = RegulatoryKnowledgeBase()
+
+    assert kb.add_faqs([make_faq("What is KYC?", "Know your customer"),
+                        make_faq("what is  KYC?", "know your customer")], embed_documents_func=embed_documents) == 1
+    assert kb.add_faqs([make_faq("What is KYC?", "Know your customer")], embed_documents_func=embed_documents) == 0
+    assert len(kb.faqs) == 1
+    assert len(kb.vector_store.embeddings) == 1
+
+
+def test_failed_embedding_leaves_faqs_addable(make_faq, embed_documents):
+    def failing(texts):
+        raise RuntimeError("service unavailable")
+
+    kb = RegulatoryKnowledgeBase()
+    with pytest.raises(RuntimeError):
+        kb.add_faqs([make_faq("What is KYC?", "Know your customer")], embed_documents_func=failing)
+
+    assert kb.faqs == []
+    assert kb.add_faqs([make_faq("What is KYC?", "Know your customer")], embed_documents_func=embed_documents) == 1
+    assert len(kb.vector_store.embeddings) == 1
+
+
+def test_add_regulatory_text_skips_duplicates():
+    kb = RegulatoryKnowledgeBase()
+
+    assert kb.add_regulatory_text("New KYC rules apply.", "Update")
+    assert not kb.add_regulatory_text("  new kyc rules   apply.", "Update")
+    assert len(kb.get_all_regulatory_texts()) == 1
+
+
+async def test_aadd_faqs_embeds_with_the_async_function(make_faq, aembed_documents):
+    kb = RegulatoryKnowledgeBase()
+
+    added = await kb.aadd_faqs([make_faq("What is KYC?", "Know your customer")],
+                               aembed_documents_func=aembed_documents)
+
+    assert added == 1
+    assert len(aembed_documents.calls) == 1
+    assert len(kb.vector_store.embeddings) == 1
+
+
+async def test_failed_aadd_faqs_stores_nothing(make_faq, aembed_documents):
+    aembed_documents.error = RuntimeError("service unavailable")
+    kb = RegulatoryKnowledgeBase()
+
+    with pytest.raises(RuntimeError):
+        await kb.aadd_faqs([make_faq("What is KYC?", "Know your customer")],
+                           aembed_documents_func=aembed_documents)
+
+    assert kb.faqs == []
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from agents import query_agent
+from agents.query_agent import QueryAgent
+from utils.memory_storage import RegulatoryKnowledgeBase
+
+
+class FakeChatModel:
+    """Answers by echoing the prompt's conversation history"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt: str):
+        self.prompts.append(prompt)
+        history = prompt.split("CONVERSATION HISTORY:\n", 1)[1].split("\n\n", 1)[0]
+        return SimpleNamespace(content=f"Answer after: {' | '.join(history.splitlines())}")
+
+    async def astream(self, prompt: str):
+        answer = (await self.ainvoke(prompt)).content
+        for start in range(0, len(answer), 8):
+            yield SimpleNamespace(content=answer[start:start + 8])
+
+
+class FakeEmbeddings:
+    async def aembed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    agent = QueryAgent(RegulatoryKnowledgeBase())
+    agent.llm = FakeChatModel()
+    agent.embeddings = FakeEmbeddings()
+
+    async def no_suggestions(query, response, context):
+        return []
+
+    monkeypatch.setattr(agent, "agenerate_suggestions", no_suggestions)
+    return agent
+
+
+async def test_opening_questions_are_answered_from_cache(agent):
+    first = await agent.aanswer_query("What is KYC?")
+    agent.clear_memory()
+    second = await agent.aanswer_query("What is KYC?")
+
+    assert len(agent.llm.prompts) == 1
+    assert second["cached"] is True
+    assert second["answer"] == first["answer"]
+
+
+async def test_follow_ups_in_different_conversations_do_not_share_answers(agent):
+    await agent.aanswer_query("What is KYC?")
+    about_kyc = await agent.aanswer_query("Can you explain this in simpler terms?")
+
+    agent.clear_memory()
+    await agent.aanswer_query("What is AML?")
+    about_aml = await agent.aanswer_query("Can you explain this in simpler terms?")
+
+    assert "cached" not in about_aml
+    assert about_kyc["answer"] != about_aml["answer"]
+    assert "User: What is AML?" in about_aml["answer"]
+
+
+async def test_streamed_tokens_add_up_to_the_final_answer(agent):
+    events = [event async for event in agent.answer_query_stream("What is KYC?")]
+
+    tokens = [event["content"] for event in events[:-1]]
+    assert len(tokens) > 1
+    assert all(event["type"] == "token" for event in events[:-1])
+    assert events[-1]["type"] == "done"
+    assert events[-1]["response"]["answer"] == "".join(tokens)
+
+    agent.clear_memory()
+    cached = [event async for event in agent.answer_query_stream("What is KYC?")]
+    assert [event["type"] for event in cached] == ["token", "done"]
+    assert cached[-1]["response"]["cached"] is True
+    assert len(agent.llm.prompts) == 1
+
+
+async def test_timed_out_search_keeps_its_slot_until_the_thread_finishes(agent, monkeypatch):
+    semaphore = asyncio.Semaphore(1)
+    monkeypatch.setattr(query_agent, "_DDGS_SEMAPHORE", semaphore)
+    monkeypatch.setattr(query_agent, "_REALTIME_SEARCH_TIMEOUT", 0.05)
+    search_done = threading.Event()
+    monkeypatch.setattr(agent, "_perform_realtime_search", lambda query: search_done.wait(5) and "results")
+
+    assert await agent._arealtime_search("KYC deadline") == ""
+    assert semaphore.locked()
+
+    search_done.set()
+    await asyncio.wait_for(semaphore.acquire(), timeout=5)
@@ -0,0 +1,75 @@
+from utils.semantic_cache import SemanticCache
+
+
+def test_exact_lookup_ignores_case_and_whitespace():
+    cache = SemanticCache()
+    cache.add("What is KYC?", None, {"answer": "Know your customer"})
+
+    assert cache.get_exact("  what   is kyc?") == {"answer": "Know your customer"}
+    assert cache.get_exact("What is AML?") is None
+
+
+def test_similar_lookup_respects_threshold():
+    cache = SemanticCache(threshold=0.9)
+    cache.add("What is KYC?", [1.0, 0.0], {"answer": "kyc"})
+
+    assert cache.get_similar([0.99, 0.05]) == {"answer": "kyc"}
+    assert cache.get_similar([0.0, 1.0]) is None
+
+
+def test_similar_lookup_without_embeddings_misses():
+    cache = SemanticCache()
+    cache.add("What is KYC?", None, {"answer": "kyc"})
+
+    assert cache.get_similar([1.0, 0.0]) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(max_size=2)
+    cache.add("first", None, {"answer": 1})
+    cache.add("second", None, {"answer": 2})
+    cache.get_exact("first")
+    cache.add("third", None, {"answer": 3})
+
+    assert len(cache) == 2
+    assert cache.get_exact("second") is None
+    assert cache.get_exact("first") == {"answer": 1}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.semantic_cache.time.time", lambda: now[0])
+    cache = SemanticCache(ttl=60)
+    cache.add("What is KYC?", [1.0, 0.0], {"answer": "kyc"})
+
+    now[0] += 30
+    assert cache.get_exact("What is KYC?") == {"answer": "kyc"}
+
+    now[0] += 60
+    assert cache.get_similar([1.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = SemanticCache()
+    cache.add("What is KYC?", [3.0, 4.0], {"answer": "kyc"})
+    cache.add("What is AML?", None, {"answer": "aml"})
+    cache.save(str(path))
+
+    restored = SemanticCache()
+    assert restored.load(str(path)) == 2
+    assert restored.get_exact("what is aml?") == {"answer": "aml"}
+    assert restored.get_similar([0.6, 0.8]) == {"answer": "kyc"}
+
+
+def test_load_ignores_cache_saved_with_another_fingerprint(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = SemanticCache()
+    cache.add("What is KYC?", None, {"answer": "kyc"})
+    cache.save(str(path), fingerprint="knowledge-base-1")
+
+    restored = SemanticCache()
+    assert restored.load(str(path), fingerprint="knowledge-base-2") == 0
+    assert restored.get_exact("What is KYC?") is None
+    assert restored.load(str(path), fingerprint="knowledge-base-1") == 1
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+from utils.session_store import InMemorySessionStore
+
+
+def _new_session():
+    return SimpleNamespace(messages=[], last_message_preview="", updated_at="")
+
+
+def _message(content: str):
+    return {"role": "user", "content": content}
+
+
+def _feedback(feedback_type: str, timestamp: str):
+    return {"feedback_type": feedback_type, "timestamp": timestamp}
+
+
+async def test_sessions_are_listed_most_recently_updated_first():
+    store = InMemorySessionStore()
+    for session_id in ("a", "b", "c"):
+        (await store.get_or_create(session_id, _new_session)).session_id = session_id
+    await store.append_messages("a", _message("hello"))
+
+    pages = [await store.list_sessions(offset=offset, limit=2) for offset in (0, 2)]
+    assert [[session.session_id for session in page] for page in pages] == [["a", "c"], ["b"]]
+
+
+async def test_append_messages_caps_history_and_sets_preview():
+    store = InMemorySessionStore(max_messages=2, preview_length=5)
+    await store.get_or_create("a", _new_session)
+    await store.append_messages("a", _message("one"), _message("two"), _message("three long"),
+                                updated_at="2024-01-01T00:00:00")
+
+    session = await store.get("a")
+    assert [message["content"] for message in session.messages] == ["two", "three long"]
+    assert session.last_message_preview == "three..."
+    assert session.updated_at == "2024-01-01T00:00:00"
+
+
+async def test_messages_for_deleted_session_are_dropped():
+    store = InMemorySessionStore()
+    await store.get_or_create("a", _new_session)
+    assert await store.delete("a")
+
+    await store.append_messages("a", _message("late"))
+    assert not await store.delete("a")
+    assert await store.count_sessions() == 0
+
+
+async def test_feedback_stats_are_kept_up_to_date():
+    store = InMemorySessionStore(recent_feedback_size=2)
+    await store.add_feedback(_feedback("positive", "2024-01-02T10:00:00"))
+    await store.add_feedback(_feedback("negative", "2024-01-01T09:00:00"))
+    await store.add_feedback(_feedback("positive", "2024-01-02T11:00:00"))
+
+    stats = await store.get_feedback_stats(["2024-01-01", "2024-01-02", "2024-01-03"])
+    assert stats["totals"] == {"positive": 2, "negative": 1}
+    assert stats["total"] == 3
+    assert [entry["timestamp"] for entry in stats["recent"]] == ["2024-01-02T11:00:00", "2024-01-02T10:00:00"]
+    assert stats["daily"] == {
+        "2024-01-01": {"negative": 1},
+        "2024-01-02": {"positive": 2},
+        "2024-01-03": {}
+    }
+
+
+async def test_stored_feedback_is_bounded_but_counted_in_full():
+    store = InMemorySessionStore(recent_feedback_size=2, max_feedback=2)
+    feedback_ids = [
+        await store.add_feedback(_feedback("positive", f"2024-01-01T10:00:0{second}"))
+        for second in range(4)
+    ]
+
+    assert feedback_ids == [0, 1, 2, 3]
+    assert [entry["timestamp"] for entry in await store.list_feedback()] == [
+        "2024-01-01T10:00:02", "2024-01-01T10:00:03"
+    ]
+    stats = await store.get_feedback_stats(["2024-01-01"])
+    assert stats["total"] == 4
+    assert stats["daily"] == {"2024-01-01": {"positive": 4}}
+    assert [entry["timestamp"] for entry in stats["recent"]] == ["2024-01-01T10:00:03", "2024-01-01T10:00:02"]
+
+
+async def test_least_recently_updated_sessions_are_evicted():
+    store = InMemorySessionStore(max_sessions=2)
+    for session_id in ("a", "b"):
+        await store.get_or_create(session_id, _new_session)
+    await store.append_messages("a", _message("keep me"))
+    await store.get_or_create("c", _new_session)
+
+    assert await store.get("a") is not None
+    assert await store.get("b") is None
+    assert await store.count_sessions() == 2
+
+
+async def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("utils.session_store.time.monotonic", lambda: now[0])
+
+    store = InMemorySessionStore(session_ttl=60)
+    await store.get_or_create("a", _new_session)
+    await store.get_or_create("b", _new_session)
+    now[0] += 30
+    await store.append_messages("b", _message("still here"))
+    now[0] += 45
+
+    assert await store.get("a") is None
+    assert await store.get("b") is not None
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from agents.validation_agent import ValidationAgent
+
+APPROVAL = {"approved": True, "accuracy_score": 9, "risk_level": "low"}
+
+
+class FakePanelModel:
+    """Returns a fixed panel response and records every call"""
+
+    def __init__(self, feedback):
+        self.content = orjson.dumps(feedback).decode()
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=self.content)
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+def _panel_feedback(*faq_keys):
+    return {key: {persona: APPROVAL for persona in ("legal", "risk", "customer")} for key in faq_keys}
+
+
+@pytest.fixture
+def faqs(make_faq):
+    return [make_faq("What is KYC?", "Know your customer."),
+            make_faq("When is the deadline?", "December 31."),
+            make_faq("What is KYC?", "Know your customer.")]
+
+
+def _agent(feedback) -> ValidationAgent:
+    agent = ValidationAgent()
+    agent.panel_llm = FakePanelModel(feedback)
+    return agent
+
+
+def test_workflow_reviews_all_faqs_in_one_call(faqs):
+    agent = _agent(_panel_feedback("faq_0", "faq_1"))
+
+    result = agent.simulate_expert_workflow(faqs, "Regulatory text")
+
+    assert agent.panel_llm.calls == 1
+    assert [feedback["overall_approved"] for feedback in result["validation_feedback"].values()] == [True] * 3
+
+
+async def test_async_workflow_matches_sync_workflow(faqs):
+    sync_agent = _agent(_panel_feedback("faq_0", "faq_1"))
+    async_agent = _agent(_panel_feedback("faq_0", "faq_1"))
+
+    expected = sync_agent.simulate_expert_workflow(faqs, "Regulatory text")
+    result = await async_agent.asimulate_expert_workflow(faqs, "Regulatory text")
+
+    assert async_agent.panel_llm.calls == 1
+    assert result == expected
+
+
+def test_identical_workflows_reuse_cached_review(faqs):
+    agent = _agent(_panel_feedback("faq_0", "faq_1"))
+
+    agent.simulate_expert_workflow(faqs, "Regulatory text")
+    agent.simulate_expert_workflow(faqs, "Regulatory text")
+
+    assert agent.panel_llm.calls == 1
+
+
+def test_feedback_keyed_differently_gets_fallback_and_is_not_cached(make_faq):
+    agent = _agent({"faq_7": _panel_feedback("faq_0")["faq_0"]})
+    faq = make_faq("What is KYC?", "Know your customer.")
+
+    review = agent.validate_faq(faq, "Regulatory text")
+    agent.validate_faq(faq, "Regulatory text")
+
+    assert review["legal"]["notes"].startswith("Automated validation completed")
+    assert agent.panel_llm.calls == 2
+
+
+def test_fallback_reviews_do_not_share_lists(make_faq):
+    agent = _agent({"faq_7": {}})
+
+    review = agent.validate_faq(make_faq("What is KYC?", "Know your customer."), "Regulatory text")
+    review["legal"]["suggestions"].append("Cite the circular")
+
+    assert review["risk"]["suggestions"] == ["Consider consulting with legal experts for final review"]
+
+
+def test_missing_review_fields_get_defaults_of_their_own(make_faq):
+    agent = _agent({"faq_0": {"legal": {"approved": True}, "risk": None}})
+
+    review = agent.validate_faq(make_faq("What is KYC?", "Know your customer."), "Regulatory text")
+    review["legal"]["issues"].append("Outdated reference")
+
+    assert review["legal"]["accuracy_score"] == 5
+    assert review["risk"]["issues"] == []
+    assert review["customer"]["issues"] == []
@@ -0,0 +1,109 @@
+import functools
+import os
+import httpx
+import openai
+from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
+from config.azure_config import AZURE_OPENAI_CONFIG
+from utils.concurrency import DynamicSemaphore
+
+# Connection pool limits shared by every Azure OpenAI client
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+# Fail fast on unreachable endpoints, but give long completions time to stream back
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+
+def _is_azure_overload(error: BaseException) -> bool:
+    """Whether a failed request indicates throttling or an unhealthy service"""
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+# Caps concurrent Azure OpenAI requests made from the event loop, so bursts
+# (per-FAQ validation, batch chat) queue here instead of tripping 429s. The cap
+# starts at AZURE_MAX_INFLIGHT, shrinks on throttling or service errors and
+# recovers while requests succeed; rate limited requests are retried by the
+# OpenAI client, honoring retry-after.
+AZURE_SEM = DynamicSemaphore(
+    initial_limit=int(os.getenv("AZURE_MAX_INFLIGHT", "5")),
+    min_limit=1,
+    max_limit=32,
+    is_overload=_is_azure_overload
+)
+
+# HTTP/2 multiplexes concurrent requests over one TLS connection; httpx needs
+# the optional h2 package for it
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """Shared sync HTTP client, so TCP/TLS sessions are reused across calls"""
+    return httpx.Client(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared async HTTP client, so TCP/TLS sessions are reused across calls"""
+    return httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+
+
+@functools.lru_cache(maxsize=8)
+def get_chat_llm(temperature: float, max_tokens: int, json_mode: bool = False) -> AzureChatOpenAI:
+    """
+    Get the shared Azure OpenAI chat model for a generation configuration.
+
+    Args:
+        temperature: Sampling temperature
+        max_tokens: Maximum tokens to generate
+        json_mode: Constrain the model to return a single JSON object
+
+    Returns:
+        Chat model instance shared by all callers with the same configuration
+    """
+    return AzureChatOpenAI(
+        azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
+        azure_deployment=AZURE_OPENAI_CONFIG["gpt_deployment"],
+        api_version=AZURE_OPENAI_CONFIG["api_version"],
+        api_key=AZURE_OPENAI_CONFIG["api_key"],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {}
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> AzureOpenAIEmbeddings:
+    """
+    Get the shared Azure OpenAI embeddings client.
+
+    Returns:
+        Embeddings instance shared by all callers
+    """
+    return AzureOpenAIEmbeddings(
+        azure_endpoint=AZURE_OPENAI_CONFIG["endpoint"],
+        azure_deployment=AZURE_OPENAI_CONFIG["embedding_deployment"],
+        api_version=AZURE_OPENAI_CONFIG["api_version"],
+        api_key=AZURE_OPENAI_CONFIG["api_key"],
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
+    )
+
+
+async def close_http_clients():
+    """Close the shared HTTP clients (if created) and drop the models bound to them"""
+    if get_async_http_client.cache_info().currsize:
+        await get_async_http_client().aclose()
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+
+    for factory in (get_chat_llm, get_embeddings, get_async_http_client, get_http_client):
+        factory.cache_clear()
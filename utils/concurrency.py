@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class DynamicSemaphore:
+    """
+    Concurrency limiter whose limit adapts to the health of the service behind it (AIMD).
+
+    After every window of completed requests the limit grows by increase_step
+    if no request failed with an overload error; otherwise it is multiplied
+    by decrease_factor. The limit always stays within [min_limit, max_limit].
+    Latency is deliberately not a signal: a healthy service answers short
+    embedding calls and long generations in very different times.
+
+    Slots freed while requests are waiting go to interactive requests before
+    background ones, so latency-tolerant bulk work cannot starve them.
+    """
+
+    def __init__(self, initial_limit: int = 5, min_limit: int = 1, max_limit: int = 32,
+                 increase_step: float = 0.5,
+                 decrease_factor: float = 0.5, window: int = 50,
+                 is_overload: Callable[[BaseException], bool] = lambda e: False):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.window = window
+        self._is_overload = is_overload
+
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        # Futures of coroutines waiting for a slot, in arrival order
+        self._waiters = deque()
+        self._background_waiters = deque()
+
+        # Completed requests and overload failures since the last adjustment
+        self._completed = 0
+        self._overloaded = 0
+
+    @property
+    def current_limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self, background: bool = False):
+        """
+        Wait for a free slot.
+
+        Args:
+            background: Queue behind interactive requests while waiting
+        """
+        waiters = self._background_waiters if background else self._waiters
+        if not self._waiters and not waiters and self._in_flight < self.current_limit:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """Free a slot and hand it to the next waiter if the limit allows"""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def record(self, overloaded: bool):
+        """
+        Record the outcome of a completed request, adjusting the limit once per window.
+
+        Args:
+            overloaded: Whether the request failed because the service is overloaded
+        """
+        self._completed += 1
+        self._overloaded += overloaded
+        if self._completed >= self.window:
+            self._adjust_limit()
+
+    @asynccontextmanager
+    async def slot(self, background: bool = False) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of one request and record its outcome.
+
+        Args:
+            background: The request is latency-tolerant and yields to interactive ones
+        """
+        await self.acquire(background)
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = self._is_overload(e)
+            raise
+        finally:
+            self.release()
+            self.record(overloaded)
+
+    def _adjust_limit(self):
+        """Additively increase the limit while healthy, multiplicatively decrease it on overload"""
+        overloaded = self._overloaded > 0
+        self._completed = self._overloaded = 0
+
+        previous = self.current_limit
+        if overloaded:
+            self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        else:
+            self._limit = min(self.max_limit, self._limit + self.increase_step)
+
+        if self.current_limit != previous:
+            logger.info(f"Concurrency limit changed from {previous} to {self.current_limit}"
+                        f" ({'overloaded' if overloaded else 'healthy'})")
+
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        for waiters in (self._waiters, self._background_waiters):
+            while waiters and self._in_flight < self.current_limit:
+                future = waiters.popleft()
+                if not future.done():
+                    self._in_flight += 1
+                    future.set_result(None)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into multi-input calls.
+
+    Callers await embed(text); texts that arrive within max_wait_ms of each
+    other (up to max_batch_size) are sent to the embeddings API together and
+    each caller receives its own vector. Until start() is called, or after
+    stop(), every text is embedded on its own.
+    """
+
+    def __init__(self, embed_documents_func: Callable[[List[str]], Awaitable[List[List[float]]]],
+                 max_batch_size: int = 16, max_wait_ms: float = 20):
+        self._embed_documents = embed_documents_func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batches: Set[asyncio.Task] = set()
+        # Requests taken off the queue by the collector but not yet dispatched
+        self._collecting: List[Tuple[str, asyncio.Future]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self):
+        """Start collecting requests into batches on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        """Stop batching, wait for in-flight batches and fail requests not yet dispatched"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+        pending = self._collecting
+        self._collecting = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+        self._queue = None
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text, sharing an API call with concurrent requests.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        if not self.running:
+            return (await self._embed_documents([text]))[0]
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _collect(self):
+        """Group queued requests into batches and dispatch each batch as it fills or times out"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = self._collecting = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            self._collecting = []
+            task = asyncio.create_task(self._process(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _process(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed one batch of requests and resolve each caller's future"""
+        # Identical texts in the same batch are only embedded once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            vectors = dict(zip(texts, await self._embed_documents(texts)))
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
@@ -0,0 +1,91 @@
+import json
+import re
+import orjson
+from typing import Any, Dict
+
+# Optional ```json / ``` fence the model sometimes wraps around JSON output
+_FENCE_RE = re.compile(r'^```(?:json)?\s*\n?(.*?)\n?```\s*$', re.DOTALL)
+
+# Opening fence of a response that was cut off before its closing fence
+_OPEN_FENCE_RE = re.compile(r'^```(?:json)?\s*\n?')
+
+_WHITESPACE_RE = re.compile(r'\s*')
+
+_DECODER = json.JSONDecoder()
+
+
+def parse_llm_json(text: str) -> Any:
+    """
+    Parse JSON returned by an LLM, tolerating a surrounding markdown code fence.
+
+    Args:
+        text: Raw response content
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: If the payload is not valid JSON
+            (orjson.JSONDecodeError is a subclass)
+    """
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    return orjson.loads(match.group(1) if match else text)
+
+
+def dumps_json(value: Any, indent: bool = False) -> str:
+    """
+    Serialize a value to a JSON string for use in prompts.
+
+    Args:
+        value: JSON-serializable value
+        indent: Pretty-print with two-space indentation
+
+    Returns:
+        JSON text
+    """
+    return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else None).decode()
+
+
+def parse_partial_json_object(text: str) -> Dict[str, Any]:
+    """
+    Recover the complete top-level members of a JSON object that was cut off,
+    e.g. because the LLM hit its token limit mid-response.
+
+    Args:
+        text: Raw response content
+
+    Returns:
+        Members that were fully present before the point of truncation
+    """
+    text = text.strip()
+    match = _FENCE_RE.match(text)
+    text = match.group(1) if match else _OPEN_FENCE_RE.sub("", text, count=1)
+
+    start = text.find("{")
+    if start < 0:
+        return {}
+
+    members = {}
+    pos = _WHITESPACE_RE.match(text, start + 1).end()
+
+    while pos < len(text) and text[pos] != "}":
+        try:
+            key, pos = _DECODER.raw_decode(text, pos)
+            pos = _WHITESPACE_RE.match(text, pos).end()
+            if not isinstance(key, str) or text[pos:pos + 1] != ":":
+                break
+
+            pos = _WHITESPACE_RE.match(text, pos + 1).end()
+            value, pos = _DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+
+        members[key] = value
+
+        pos = _WHITESPACE_RE.match(text, pos).end()
+        if text[pos:pos + 1] != ",":
+            break
+        pos = _WHITESPACE_RE.match(text, pos + 1).end()
+
+    return members
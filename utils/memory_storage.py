@@ -1,19 +1,83 @@
+import hashlib
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import re
+import threading
 from typing import List, Dict, Any, Tuple
-import json
+from dataclasses import dataclass
 from datetime import datetime
 
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# HNSW graph parameters: links per node, and candidate list sizes while building and searching
+_ANN_M = 16
+_ANN_EF_CONSTRUCTION = 200
+_ANN_EF_SEARCH = 64
+
+# Query words too common to count as keywords in FAQ text matching
+_STOP_WORDS = frozenset((
+    "the", "and", "for", "are", "what", "when", "where", "which", "who", "how", "why",
+    "does", "will", "can", "this", "that", "these", "those", "with", "from", "about",
+    "have", "has", "my", "our", "your", "you", "new", "any", "there", "their"
+))
+
+_WORD_RE = re.compile(r'\w+')
+
+
+@dataclass(slots=True)
+class FAQ:
+    """FAQ stored in the knowledge base; slotted, since the store may hold many"""
+    question: str
+    answer: str
+    regulatory_context: str
+    created_at: str
+    validated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "question": self.question,
+            "answer": self.answer,
+            "regulatory_context": self.regulatory_context,
+            "created_at": self.created_at,
+            "validated": self.validated
+        }
+
+
+def _content_digest(*parts: str) -> bytes:
+    """Hash of text parts after case and whitespace normalization, for duplicate detection"""
+    normalized = "\x00".join(" ".join(part.lower().split()) for part in parts)
+    return hashlib.blake2b(normalized.encode(), digest_size=16).digest()
+
 class InMemoryVectorStore:
     """
     Simple in-memory vector store using cosine similarity for document retrieval.
     Avoids external databases as per requirements.
+
+    With quantize=True the search matrix is held as int8 with a per-row scale,
+    cutting its memory 4x at the cost of a small loss in score precision.
+
+    Once the store holds ann_min_documents documents and hnswlib is installed,
+    searches go through an approximate HNSW index instead of scoring every
+    document; smaller stores are always searched exactly.
+
+    Searches may run on worker threads while documents are added.
     """
 
-    def __init__(self):
+    def __init__(self, quantize: bool = False, ann_min_documents: int = 5000):
         self.documents = []
         self.embeddings = []
         self.metadata = []
+        self.quantize = quantize
+        self.ann_min_documents = ann_min_documents
+        # L2-normalized copy of self.embeddings (float32 or int8) in the first
+        # _size rows of a buffer that doubles in capacity when full
+        self._matrix = None
+        self._scales = None  # Per-row dequantization scales when quantized, buffered the same way
+        self._size = 0
+        self._ann_index = None  # HNSW index over self.embeddings, built once the store is large enough
+        self._lock = threading.Lock()
 
     def add_documents(self, documents: List[str], embeddings: List[List[float]], metadata: List[Dict] = None):
         """
@@ -24,13 +88,26 @@ class InMemoryVectorStore:
             embeddings: List of embedding vectors
             metadata: Optional metadata for each document
         """
-        self.documents.extend(documents)
-        self.embeddings.extend(embeddings)
+        # Only the new rows are normalized; existing rows are kept as they are
+        rows = self._prepare_rows(embeddings) if embeddings else None
 
-        if metadata:
-            self.metadata.extend(metadata)
-        else:
-            self.metadata.extend([{}] * len(documents))
+        with self._lock:
+            first_id = len(self.embeddings)
+            self.documents.extend(documents)
+            self.embeddings.extend(embeddings)
+
+            if metadata:
+                self.metadata.extend(metadata)
+            else:
+                self.metadata.extend([{}] * len(documents))
+
+            if embeddings:
+                self._append_rows(*rows)
+
+                if self._ann_index is not None:
+                    self._add_to_ann_index(embeddings, first_id)
+                elif hnswlib is not None and len(self.embeddings) >= self.ann_min_documents:
+                    self._build_ann_index()
 
     def similarity_search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[str, Dict, float]]:
         """
@@ -43,47 +120,141 @@ class InMemoryVectorStore:
         Returns:
             List of tuples (document, metadata, similarity_score)
         """
-        if not self.embeddings:
-            return []
-
-        # Convert to numpy arrays
-        query_vector = np.array(query_embedding).reshape(1, -1)
-        doc_vectors = np.array(self.embeddings)
-
-        # Calculate cosine similarities
-        similarities = cosine_similarity(query_vector, doc_vectors)[0]
-
-        # Get top-k indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-
-        results = []
-        for idx in top_indices:
-            results.append((
-                self.documents[idx],
-                self.metadata[idx],
-                float(similarities[idx])
-            ))
+        with self._lock:
+            if not self._size:
+                return []
+            documents, metadata = self.documents, self.metadata
+
+            if self._ann_index is not None:
+                labels, distances = self._ann_index.knn_query(
+                    np.asarray(query_embedding, dtype=np.float32), k=min(top_k, self._size)
+                )
+                return [
+                    (documents[idx], metadata[idx], 1.0 - distance)
+                    for idx, distance in zip(labels[0].tolist(), distances[0].tolist())
+                ]
+
+            # Rows past _size may be written by later additions, and a full
+            # buffer is replaced rather than resized, so these views stay valid
+            matrix = self._matrix[:self._size]
+            scales = self._scales[:self._size] if self.quantize else None
+
+        # Cosine similarity is a single matrix-vector product over normalized rows
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
+        if query_norm:
+            query_vector = query_vector / query_norm
+
+        if self.quantize:
+            query_quantized, query_scale = self._quantize(query_vector)
+            # Integer dot products accumulated in int32, then rescaled per row
+            dots = np.einsum('ij,j->i', matrix, query_quantized, dtype=np.int32)
+            similarities = dots * (scales * query_scale)
+        else:
+            similarities = matrix @ query_vector
 
-        return results
+        # Get top-k indices without sorting the whole corpus
+        k = min(top_k, len(similarities))
+        if k <= 0:
+            return []
+        top_indices = np.argpartition(-similarities, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-similarities[top_indices])]
+
+        return [
+            (documents[idx], metadata[idx], score)
+            for idx, score in zip(top_indices.tolist(), similarities[top_indices].tolist())
+        ]
+
+    def _prepare_rows(self, embeddings: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """L2-normalize embeddings into search matrix rows, quantizing them if enabled"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        if not self.quantize:
+            return matrix, None
+
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _append_rows(self, rows: np.ndarray, scales: np.ndarray):
+        """Copy prepared rows (and their scales) into the buffers, doubling their capacity as needed"""
+        required = self._size + len(rows)
+        if self._matrix is None or required > len(self._matrix):
+            capacity = max(64, required, 2 * self._size)
+            matrix = np.empty((capacity, rows.shape[1]), dtype=rows.dtype)
+            scales_buffer = np.empty(capacity, dtype=np.float32) if self.quantize else None
+            if self._size:
+                matrix[:self._size] = self._matrix[:self._size]
+                if self.quantize:
+                    scales_buffer[:self._size] = self._scales[:self._size]
+            self._matrix, self._scales = matrix, scales_buffer
+
+        self._matrix[self._size:required] = rows
+        if self.quantize:
+            self._scales[self._size:required] = scales
+        self._size = required
+
+    def _build_ann_index(self):
+        """Build the HNSW index over all stored embeddings"""
+        ann_index = hnswlib.Index(space='cosine', dim=len(self.embeddings[0]))
+        ann_index.init_index(
+            max_elements=2 * len(self.embeddings),
+            ef_construction=_ANN_EF_CONSTRUCTION,
+            M=_ANN_M
+        )
+        ann_index.set_ef(_ANN_EF_SEARCH)
+        self._ann_index = ann_index
+        self._add_to_ann_index(self.embeddings, 0)
+
+    def _add_to_ann_index(self, embeddings: List[List[float]], first_id: int):
+        """Insert embeddings into the HNSW index under consecutive ids, growing it as needed"""
+        required = first_id + len(embeddings)
+        if required > self._ann_index.get_max_elements():
+            self._ann_index.resize_index(2 * required)
+        self._ann_index.add_items(np.asarray(embeddings, dtype=np.float32), np.arange(first_id, required))
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Quantize a vector to int8 with a single symmetric scale"""
+        scale = float(np.abs(vector).max()) / 127.0 or 1.0
+        return np.round(vector / scale).astype(np.int8), scale
 
     def clear(self):
         """Clear all documents and embeddings"""
-        self.documents = []
-        self.embeddings = []
-        self.metadata = []
+        with self._lock:
+            self.documents = []
+            self.embeddings = []
+            self.metadata = []
+            self._matrix = None
+            self._scales = None
+            self._size = 0
+            self._ann_index = None
 
 
 class RegulatoryKnowledgeBase:
     """
     Specialized knowledge base for regulatory information with FAQ storage.
+
+    Regulatory texts and FAQs that are already stored (ignoring case and
+    whitespace) are not stored again.
     """
 
-    def __init__(self):
+    def __init__(self, quantize_embeddings: bool = False):
         self.faqs = []
+        # Lowercased question and answer columns for text matching, aligned with self.faqs
+        self._questions_lower = []
+        self._answers_lower = []
         self.regulatory_texts = []
-        self.vector_store = InMemoryVectorStore()
+        self.vector_store = InMemoryVectorStore(quantize=quantize_embeddings)
 
-    def add_regulatory_text(self, text: str, source: str = "", date: str = ""):
+        # Content digests of everything stored, for duplicate detection
+        self._faq_digests = set()
+        self._regulatory_text_digests = set()
+
+    def add_regulatory_text(self, text: str, source: str = "", date: str = "") -> bool:
         """
         Add regulatory text to the knowledge base.
 
@@ -91,7 +262,15 @@ class RegulatoryKnowledgeBase:
             text: The regulatory text content
             source: Source of the regulatory information
             date: Date of the regulatory update
+
+        Returns:
+            False if the text was already stored, True otherwise
         """
+        digest = _content_digest(text)
+        if digest in self._regulatory_text_digests:
+            return False
+        self._regulatory_text_digests.add(digest)
+
         metadata = {
             "type": "regulatory_text",
             "source": source,
@@ -103,31 +282,113 @@ class RegulatoryKnowledgeBase:
             "content": text,
             "metadata": metadata
         })
+        return True
+
+    def add_faqs(self, faqs: List[Dict[str, Any]], regulatory_context: str = "", embed_documents_func=None) -> int:
+        """
+        Add FAQs to the knowledge base, skipping any that are already stored.
+
+        Args:
+            faqs: List of FAQ dictionaries with 'question' and 'answer' keys
+            regulatory_context: Context about the regulatory changes
+            embed_documents_func: Optional function embedding a list of texts in one batched call;
+                when given, the FAQs are also indexed for semantic search. If it
+                raises, nothing is stored and the FAQs can be added again later.
 
-    def add_faqs(self, faqs: List[Dict[str, Any]], regulatory_context: str = ""):
+        Returns:
+            Number of FAQs added
+        """
+        new_faqs = self._unseen_faqs(faqs)
+        embeddings = None
+        if embed_documents_func and new_faqs:
+            embeddings = embed_documents_func([self._faq_document(faq) for faq in new_faqs])
+        return self._store_faqs(new_faqs, regulatory_context, embeddings)
+
+    async def aadd_faqs(self, faqs: List[Dict[str, Any]], regulatory_context: str = "",
+                        aembed_documents_func=None) -> int:
         """
-        Add FAQs to the knowledge base.
+        Async variant of add_faqs, for callers on the event loop.
 
         Args:
             faqs: List of FAQ dictionaries with 'question' and 'answer' keys
             regulatory_context: Context about the regulatory changes
+            aembed_documents_func: Optional coroutine function embedding a list of texts
+
+        Returns:
+            Number of FAQs added
         """
+        new_faqs = self._unseen_faqs(faqs)
+        embeddings = None
+        if aembed_documents_func and new_faqs:
+            embeddings = await aembed_documents_func([self._faq_document(faq) for faq in new_faqs])
+        # FAQs stored by another update while embedding are skipped here
+        return self._store_faqs(new_faqs, regulatory_context, embeddings)
+
+    def _unseen_faqs(self, faqs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """FAQs that are not stored yet, without repeats within the list"""
+        unseen = {}
         for faq in faqs:
-            faq_entry = {
-                "question": faq.get("question", ""),
-                "answer": faq.get("answer", ""),
-                "regulatory_context": regulatory_context,
-                "created_at": datetime.now().isoformat(),
-                "validated": faq.get("validated", False)
-            }
+            digest = _content_digest(faq.get("question", ""), faq.get("answer", ""))
+            if digest not in self._faq_digests:
+                unseen.setdefault(digest, faq)
+        return list(unseen.values())
+
+    @staticmethod
+    def _faq_document(faq: Dict[str, Any]) -> str:
+        """Text an FAQ is embedded and indexed as"""
+        return f"{faq.get('question', '')}\n{faq.get('answer', '')}"
+
+    def _store_faqs(self, faqs: List[Dict[str, Any]], regulatory_context: str,
+                    embeddings: List[List[float]] = None) -> int:
+        """Record FAQs (and their embeddings, if given) that are still not stored; returns how many were"""
+        new_entries = []
+        new_embeddings = []
+        for i, faq in enumerate(faqs):
+            digest = _content_digest(faq.get("question", ""), faq.get("answer", ""))
+            if digest in self._faq_digests:
+                continue
+            self._faq_digests.add(digest)
+
+            faq_entry = FAQ(
+                question=faq.get("question", ""),
+                answer=faq.get("answer", ""),
+                regulatory_context=regulatory_context,
+                created_at=datetime.now().isoformat(),
+                validated=faq.get("validated", False)
+            )
             self.faqs.append(faq_entry)
+            self._questions_lower.append(faq_entry.question.lower())
+            self._answers_lower.append(faq_entry.answer.lower())
+            new_entries.append(faq_entry)
+            if embeddings is not None:
+                new_embeddings.append(embeddings[i])
+
+        if new_embeddings:
+            documents = [f"{entry.question}\n{entry.answer}" for entry in new_entries]
+            metadata = [
+                {"type": "faq", "question": entry.question, "answer": entry.answer}
+                for entry in new_entries
+            ]
+            self.vector_store.add_documents(documents, new_embeddings, metadata)
+
+        return len(new_entries)
+
+    def content_digest(self) -> str:
+        """Digest of the stored FAQs and regulatory texts, independent of insertion order"""
+        digest = hashlib.blake2b(digest_size=16)
+        for digests in (self._faq_digests, self._regulatory_text_digests):
+            digest.update(b"".join(sorted(digests)))
+            digest.update(b"\x00")
+        return digest.hexdigest()
 
     def get_recent_faqs(self, limit: int = 10) -> List[Dict]:
         """Get most recent FAQs"""
-        sorted_faqs = sorted(self.faqs, key=lambda x: x["created_at"], reverse=True)
-        return sorted_faqs[:limit]
+        # add_faqs only appends, stamping each entry with the current time, so
+        # self.faqs is already in created_at order
+        return [faq.to_dict() for faq in self.faqs[:-limit - 1:-1]] if limit > 0 else []
 
-    def search_faqs(self, query: str, embedding_func=None, top_k: int = 5) -> List[Dict]:
+    def search_faqs(self, query: str, embedding_func=None, top_k: int = 5,
+                    query_embedding: List[float] = None) -> List[Dict]:
         """
         Search FAQs using semantic similarity if embeddings are available,
         otherwise use simple text matching.
@@ -136,10 +397,12 @@ class RegulatoryKnowledgeBase:
             query: Search query
             embedding_func: Function to generate embeddings
             top_k: Number of results to return
+            query_embedding: Precomputed query embedding, used instead of embedding_func
         """
-        if embedding_func and self.vector_store.embeddings:
+        if (query_embedding is not None or embedding_func) and self.vector_store.embeddings:
             # Use semantic search
-            query_embedding = embedding_func(query)
+            if query_embedding is None:
+                query_embedding = embedding_func(query)
             results = self.vector_store.similarity_search(query_embedding, top_k)
 
             faq_results = []
@@ -154,26 +417,48 @@ class RegulatoryKnowledgeBase:
             return faq_results
 
         else:
-            # Use simple text matching
+            # Use simple text matching: the whole query as a phrase, or else
+            # its keywords, all found in a single scan of each FAQ
             query_lower = query.lower()
+            keywords = list(dict.fromkeys(
+                word for word in _WORD_RE.findall(query_lower)
+                if len(word) > 2 and word not in _STOP_WORDS
+            ))
+            keyword_re = re.compile("|".join(map(re.escape, keywords))) if len(keywords) > 1 else None
+            keyword = keywords[0] if len(keywords) == 1 else None
             matching_faqs = []
 
-            for faq in self.faqs:
-                question_match = query_lower in faq["question"].lower()
-                answer_match = query_lower in faq["answer"].lower()
+            for faq, question_lower, answer_lower in zip(self.faqs, self._questions_lower, self._answers_lower):
+                question_match = query_lower in question_lower
+                answer_match = query_lower in answer_lower
 
                 if question_match or answer_match:
                     score = 1.0 if question_match else 0.7
-                    matching_faqs.append({
-                        "question": faq["question"],
-                        "answer": faq["answer"],
-                        "score": score,
-                        "metadata": faq
-                    })
+                elif keyword_re is not None:
+                    # Partial credit, below any phrase match, once half the keywords appear
+                    found = set(keyword_re.findall(question_lower))
+                    found.update(keyword_re.findall(answer_lower))
+                    if len(found) * 2 < len(keywords):
+                        continue
+                    score = 0.5 * len(found) / len(keywords)
+                elif keyword is not None and (keyword in question_lower or keyword in answer_lower):
+                    score = 0.5
+                else:
+                    continue
+
+                matching_faqs.append({
+                    "question": faq.question,
+                    "answer": faq.answer,
+                    "score": score,
+                    "metadata": faq
+                })
 
             # Sort by score and return top_k
             matching_faqs.sort(key=lambda x: x["score"], reverse=True)
-            return matching_faqs[:top_k]
+            matching_faqs = matching_faqs[:top_k]
+            for match in matching_faqs:
+                match["metadata"] = match["metadata"].to_dict()
+            return matching_faqs
 
     def get_all_regulatory_texts(self) -> List[Dict]:
         """Get all regulatory texts"""
@@ -182,5 +467,9 @@ class RegulatoryKnowledgeBase:
     def clear_all(self):
         """Clear all stored data"""
         self.faqs = []
+        self._questions_lower = []
+        self._answers_lower = []
         self.regulatory_texts = []
         self.vector_store.clear()
+        self._faq_digests.clear()
+        self._regulatory_text_digests.clear()
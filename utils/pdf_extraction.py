@@ -0,0 +1,52 @@
+import PyPDF2
+import pdfplumber
+try:
+    import fitz  # PyMuPDF: C-based extraction, much faster than pdfplumber
+except ImportError:
+    fitz = None
+
+
+def extract_text(pdf_path: str) -> str:
+    """Extract text from PDF using PyMuPDF when installed, else pdfplumber, falling back to PyPDF2.
+
+    Runs in a worker process, so it takes a file path rather than the upload
+    and raises ValueError instead of HTTPException. It lives in its own module
+    so spawned workers import only the PDF libraries, not the whole app.
+    """
+    if fitz is not None:
+        try:
+            with fitz.open(pdf_path) as doc:
+                text = "\n".join(page.get_text("text") for page in doc).strip()
+            if text:
+                return text
+        except Exception as e:
+            print(f"Error extracting text with PyMuPDF: {e}")
+
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            text = ""
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    text += page_text + "\n"
+
+            if not text.strip():
+                # Fallback to PyPDF2 if pdfplumber fails
+                pdf_reader = PyPDF2.PdfReader(pdf_path)
+                text = ""
+                for page in pdf_reader.pages:
+                    text += page.extract_text() + "\n"
+
+            return text.strip()
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
+        # Final fallback to PyPDF2
+        try:
+            pdf_reader = PyPDF2.PdfReader(pdf_path)
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text() + "\n"
+            return text.strip()
+        except Exception as e2:
+            print(f"Error with PyPDF2 fallback: {e2}")
+            raise ValueError("Unable to extract text from PDF") from e2
@@ -0,0 +1,52 @@
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Small token-classification model used by LLMLingua-2; runs on CPU
+_COMPRESSION_MODEL = "microsoft/llmlingua-2-bert-base-multilingual-cased-meetingbank"
+
+# Tokens that are always kept so sentence and paragraph structure survives
+_FORCE_TOKENS = ["\n", "."]
+
+
+@functools.lru_cache(maxsize=1)
+def _get_compressor():
+    """Load the prompt compressor once, or return None if llmlingua is unavailable"""
+    try:
+        from llmlingua import PromptCompressor
+    except ImportError:
+        logger.warning("llmlingua is not installed; regulatory text will be sent uncompressed")
+        return None
+
+    return PromptCompressor(model_name=_COMPRESSION_MODEL, use_llmlingua2=True, device_map="cpu")
+
+
+@functools.lru_cache(maxsize=32)
+def compress_text(text: str, rate: float = 0.5) -> str:
+    """
+    Drop low-information tokens from a long text before it is put in a prompt.
+
+    Results are cached, so repeated prompts about the same text share one
+    compression pass.
+
+    Args:
+        text: Text to compress
+        rate: Fraction of tokens to keep
+
+    Returns:
+        Compressed text, or the original text if compression is unavailable or fails
+    """
+    compressor = _get_compressor()
+    if compressor is None or not text.strip():
+        return text
+
+    try:
+        result = compressor.compress_prompt(text, rate=rate, force_tokens=_FORCE_TOKENS)
+        compressed = result["compressed_prompt"]
+        logger.info(f"Compressed text from {result['origin_tokens']} to {result['compressed_tokens']} tokens")
+        return compressed
+
+    except Exception as e:
+        logger.error(f"Error compressing text: {e}")
+        return text
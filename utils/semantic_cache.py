@@ -0,0 +1,175 @@
+import time
+import numpy as np
+import orjson
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+
+class SemanticCache:
+    """
+    Two-tier response cache for customer queries.
+
+    The first tier is an exact-match lookup on the normalized query text. The
+    second tier matches on cosine similarity between query embeddings, so
+    paraphrases ("what is KYC?" / "explain KYC") can reuse a previous answer.
+    Entries are evicted least-recently-used once max_size is reached, and
+    expire ttl seconds after they were cached when a ttl is set.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_size: int = 1024, ttl: Optional[float] = None):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # normalized query -> (unit embedding or None, response, cached_at epoch seconds)
+        self._matrix = None
+        self._matrix_keys = []
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize query text for exact matching"""
+        return " ".join(query.lower().split())
+
+    def get_exact(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a response cached for exactly the same (normalized) query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            Cached response, or None on a miss
+        """
+        key = self.normalize(query)
+        entry = self._entries.get(key)
+        if entry is None or self._expire(key, entry):
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get_similar(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Look up the cached response whose query embedding is most similar.
+
+        Args:
+            embedding: Embedding vector for the query
+
+        Returns:
+            Cached response if the best match reaches the threshold, else None
+        """
+        matrix = self._get_matrix()
+        if matrix is None:
+            return None
+
+        similarities = matrix @ self._unit(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        key = self._matrix_keys[best]
+        entry = self._entries[key]
+        if self._expire(key, entry):
+            return None
+
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def add(self, query: str, embedding: Optional[List[float]], response: Dict[str, Any]):
+        """
+        Cache a response.
+
+        Args:
+            query: Query text
+            embedding: Embedding vector for the query (None caches for exact matches only)
+            response: Response to cache
+        """
+        key = self.normalize(query)
+        vector = self._unit(embedding) if embedding is not None else None
+
+        self._entries[key] = (vector, response, time.time())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        self._matrix = None
+
+    def clear(self):
+        """Drop all cached responses"""
+        self._entries.clear()
+        self._matrix = None
+        self._matrix_keys = []
+
+    def save(self, path: str, fingerprint: Optional[str] = None):
+        """
+        Write the cached entries to a JSON file, oldest first.
+
+        Args:
+            path: Destination file path
+            fingerprint: Identifies the data the cached answers were derived
+                from; load() ignores the file unless given the same value
+        """
+        entries = [
+            {"query": key, "embedding": vector, "response": response, "cached_at": cached_at}
+            for key, (vector, response, cached_at) in self._entries.items()
+        ]
+        with open(path, "wb") as f:
+            f.write(orjson.dumps({"fingerprint": fingerprint, "entries": entries}, option=orjson.OPT_SERIALIZE_NUMPY))
+
+    def load(self, path: str, fingerprint: Optional[str] = None) -> int:
+        """
+        Replace the cached entries with those saved by save(), unless they
+        were saved with a different fingerprint.
+
+        Args:
+            path: Source file path
+            fingerprint: Identifies the data answers should be derived from
+
+        Returns:
+            Number of entries loaded (0 if the file was ignored)
+        """
+        with open(path, "rb") as f:
+            saved = orjson.loads(f.read())
+
+        if not isinstance(saved, dict) or saved.get("fingerprint") != fingerprint:
+            return 0
+
+        self.clear()
+        for entry in saved["entries"][-self.max_size:]:
+            embedding = entry["embedding"]
+            vector = np.asarray(embedding, dtype=np.float32) if embedding is not None else None
+            self._entries[entry["query"]] = (vector, entry["response"], entry.get("cached_at", time.time()))
+
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_matrix(self) -> Optional[np.ndarray]:
+        """Stack cached embeddings into a matrix, rebuilding only after changes"""
+        if self._matrix is None:
+            keys = [key for key, (vector, _, _) in self._entries.items() if vector is not None]
+            if not keys:
+                return None
+
+            self._matrix = np.stack([self._entries[key][0] for key in keys])
+            self._matrix_keys = keys
+
+        return self._matrix
+
+    def _expire(self, key: str, entry: tuple) -> bool:
+        """Drop an entry that outlived the ttl; returns whether it was dropped"""
+        if self.ttl is None or time.time() - entry[2] < self.ttl:
+            return False
+
+        del self._entries[key]
+        if entry[0] is not None:
+            self._matrix = None
+        return True
+
+    @staticmethod
+    def _unit(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to an L2-normalized float32 vector"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
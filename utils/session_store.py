@@ -0,0 +1,203 @@
+import bisect
+import logging
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InMemorySessionStore:
+    """
+    Storage for chat sessions and message feedback used by the web app.
+
+    Sessions are kept in update order (most recently updated last), so they
+    can be listed newest-first without sorting, and each session keeps only
+    its latest max_messages messages and a last_message_preview of the
+    newest one. At most max_sessions sessions are kept;
+    the least recently updated are evicted first, and sessions not updated
+    for session_ttl seconds expire. Only the latest max_feedback feedback
+    entries are kept, while the analytics counters cover all feedback
+    received. The interface is async so a networked
+    backend can replace this one without changing the endpoints.
+
+    Methods never await while mutating state, so they are atomic with respect
+    to other coroutines on the event loop and need no lock.
+    """
+
+    def __init__(self, max_messages: int = 200, recent_feedback_size: int = 10,
+                 max_sessions: int = 10000, session_ttl: float = 24 * 3600,
+                 preview_length: int = 100, max_feedback: int = 10000):
+        self.max_messages = max_messages
+        self.preview_length = preview_length
+        self.recent_feedback_size = recent_feedback_size
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self._sessions = OrderedDict()  # session_id -> session
+        self._touched = {}  # session_id -> time.monotonic() of the last update
+        self._feedback = deque(maxlen=max_feedback)  # Latest feedback entries, oldest first
+        self._next_feedback_id = 0
+
+        # Analytics counters, maintained as feedback arrives
+        self._feedback_totals = Counter()  # feedback_type -> count
+        self._feedback_by_day = defaultdict(Counter)  # "YYYY-MM-DD" -> feedback_type -> count
+        self._recent_feedback = []  # (timestamp, feedback_id, entry) of the latest entries, ascending
+
+    async def get(self, session_id: str) -> Optional[Any]:
+        """
+        Get a session.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            The session, or None if it does not exist or has expired
+        """
+        self._evict_expired()
+        return self._sessions.get(session_id)
+
+    async def get_or_create(self, session_id: str, factory: Callable[[], Any]) -> Any:
+        """
+        Get a session, creating it if it does not exist.
+
+        Args:
+            session_id: Session identifier
+            factory: Builds the new session when needed
+
+        Returns:
+            The existing or newly created session
+        """
+        self._evict_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = factory()
+            self._touched[session_id] = time.monotonic()
+            self._evict_overflow()
+        return session
+
+    async def append_messages(self, session_id: str, *messages: Dict[str, Any],
+                              updated_at: Optional[str] = None):
+        """
+        Append messages to a session, dropping its oldest messages beyond the cap.
+        Messages for a session that was deleted meanwhile are discarded.
+
+        Args:
+            session_id: Session identifier
+            messages: Messages to append
+            updated_at: ISO-format update time (defaults to now)
+        """
+        self._evict_expired()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+
+        session.messages.extend(messages)
+        if len(session.messages) > self.max_messages:
+            del session.messages[:-self.max_messages]
+
+        if messages:
+            session.last_message_preview = messages[-1]["content"][:self.preview_length] + "..."
+
+        session.updated_at = updated_at or datetime.now().isoformat()
+        self._sessions.move_to_end(session_id)
+        self._touched[session_id] = time.monotonic()
+
+    async def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if the session existed
+        """
+        self._touched.pop(session_id, None)
+        return self._sessions.pop(session_id, None) is not None
+
+    async def list_sessions(self, offset: int = 0, limit: Optional[int] = None) -> List[Any]:
+        """
+        Get sessions, most recently updated first.
+
+        Args:
+            offset: Number of sessions to skip
+            limit: Maximum number of sessions to return (None for all)
+
+        Returns:
+            Page of sessions
+        """
+        self._evict_expired()
+        stop = offset + limit if limit is not None else None
+        return list(islice(reversed(self._sessions.values()), offset, stop))
+
+    async def count_sessions(self) -> int:
+        """Get the number of stored sessions"""
+        self._evict_expired()
+        return len(self._sessions)
+
+    def _evict_expired(self):
+        """Drop sessions not updated within session_ttl, oldest first"""
+        cutoff = time.monotonic() - self.session_ttl
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if self._touched[session_id] > cutoff:
+                break
+            self._evict(session_id, "expired")
+
+    def _evict_overflow(self):
+        """Drop the least recently updated sessions beyond max_sessions"""
+        while len(self._sessions) > self.max_sessions:
+            self._evict(next(iter(self._sessions)), "capacity reached")
+
+    def _evict(self, session_id: str, reason: str):
+        del self._sessions[session_id]
+        del self._touched[session_id]
+        logger.info(f"Evicted chat session {session_id} ({reason})")
+
+    async def add_feedback(self, entry: Dict[str, Any]) -> int:
+        """
+        Record feedback on a message.
+
+        Args:
+            entry: Feedback entry with feedback_type and an ISO-format timestamp
+
+        Returns:
+            Identifier of the stored feedback
+        """
+        self._feedback.append(entry)
+        feedback_id = self._next_feedback_id
+        self._next_feedback_id += 1
+
+        feedback_type = entry["feedback_type"]
+        self._feedback_totals[feedback_type] += 1
+        self._feedback_by_day[entry["timestamp"][:10]][feedback_type] += 1
+
+        bisect.insort(self._recent_feedback, (entry["timestamp"], feedback_id, entry))
+        if len(self._recent_feedback) > self.recent_feedback_size:
+            del self._recent_feedback[0]
+
+        return feedback_id
+
+    async def get_feedback_stats(self, days: List[str]) -> Dict[str, Any]:
+        """
+        Get feedback counts without scanning the stored feedback.
+
+        Args:
+            days: Dates ("YYYY-MM-DD") to report daily counts for
+
+        Returns:
+            Totals per feedback type, the latest feedback (newest first) and
+            per-day counts for each requested date
+        """
+        return {
+            "totals": dict(self._feedback_totals),
+            "total": self._next_feedback_id,
+            "recent": [entry for _, _, entry in reversed(self._recent_feedback)],
+            "daily": {day: dict(self._feedback_by_day.get(day, {})) for day in days}
+        }
+
+    async def list_feedback(self) -> List[Dict[str, Any]]:
+        """Get the retained feedback (the latest max_feedback entries), oldest first"""
+        return list(self._feedback)